@@ -1,12 +1,27 @@
 from flask import Flask, request, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_migrate import Migrate
 from config import config
+import logging
 import os
 
-db = SQLAlchemy()
+logger = logging.getLogger(__name__)
+
+
+class RoutingSession(Session):
+    """Session that sends read-only request statements to the replica bind (see app.utils.db_routing)"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            from app.utils.db_routing import route_bind
+            bind = route_bind(self, clause)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 migrate = Migrate()
 
@@ -18,21 +33,62 @@ def create_app(config_name=None):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
 
+    # Structured, queued logging before anything else logs
+    from app.utils.log import init_logging
+    init_logging(app)
+
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+    # Pool sizing, timeouts and the optional replica bind
+    from app.utils.db_pool import configure_engines, init_pool_monitoring
+    configure_engines(app)
+
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
+    init_pool_monitoring(app, db)
+
+    # Cached user status for claims-based authorization
+    from app.utils.auth import init_auth
+    init_auth(app)
+
+    # Audit log writer
+    from app.utils.audit import init_audit
+    init_audit(app)
+
+    # Batched product view counting
+    from app.utils.view_counter import init_view_counter
+    init_view_counter(app)
+
+    # Response cache for public catalog endpoints
+    from app.utils.cache import init_cache
+    init_cache(app)
+
+    # Pub/sub for pushed message notifications
+    from app.utils.notifications import init_notifications
+    init_notifications(app)
+
+    # Replayed responses for retried writes carrying an Idempotency-Key
+    from app.utils.idempotency import init_idempotency
+    init_idempotency(app)
+
+    # Per-request latency, SQL and serialization metrics
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+
+    # N+1 and slow query warnings (development and testing)
+    from app.utils.query_detector import init_query_detector
+    init_query_detector(app)
 
     # Configure CORS to prevent preflight redirect issues
     CORS(app,
          resources={r"/api/*": {
              "origins": app.config['CORS_ORIGINS'],
              "methods": ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
-             "allow_headers": ['Content-Type', 'Authorization'],
-             "expose_headers": ['Content-Type', 'Authorization'],
+             "allow_headers": ['Content-Type', 'Authorization', 'Idempotency-Key'],
+             "expose_headers": ['Content-Type', 'Authorization', 'Idempotent-Replayed'],
              "supports_credentials": True,
              "max_age": 3600
          }})
@@ -71,7 +127,7 @@ def create_app(config_name=None):
             response = app.make_response('')
             response.headers['Access-Control-Allow-Origin'] = request.headers.get('Origin', '*')
             response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Idempotency-Key'
             response.headers['Access-Control-Max-Age'] = '3600'
             response.headers['Access-Control-Allow-Credentials'] = 'true'
             return response, 200
@@ -79,17 +135,17 @@ def create_app(config_name=None):
     # JWT error handlers
     @jwt.unauthorized_loader
     def unauthorized_callback(callback):
-        print(f"[JWT DEBUG] Unauthorized callback triggered: {callback}")
+        logger.debug('Unauthorized request: %s', callback)
         return {'message': 'Missing or invalid token'}, 401
 
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
-        print(f"[JWT DEBUG] Expired token - Header: {jwt_header}, Payload: {jwt_payload}")
+        logger.debug('Expired token', extra={'user_id': jwt_payload.get('sub')})
         return {'message': 'Token has expired'}, 401
 
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
-        print(f"[JWT DEBUG] Invalid token - Error: {error}")
+        logger.debug('Invalid token: %s', error)
         return {'message': 'Invalid token'}, 401
 
     return app
@@ -9,6 +9,10 @@ from app.models.cart_item import CartItem
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.activity_log import ActivityLog
+from app.models.message import Message
+from app.models.conversation import Conversation
+from app.models.unread_counter import UnreadCounter
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     'User',
@@ -21,5 +25,9 @@ __all__ = [
     'CartItem',
     'Order',
     'OrderItem',
-    'ActivityLog'
+    'ActivityLog',
+    'Message',
+    'Conversation',
+    'UnreadCounter',
+    'IdempotencyKey'
 ]
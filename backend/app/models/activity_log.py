@@ -14,6 +14,12 @@ class ActivityLog(db.Model):
     user_agent = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
+    # Keyset pagination seeks on (created_at, id), optionally within one action
+    __table_args__ = (
+        db.Index('ix_activity_logs_created_at_id', 'created_at', 'id'),
+        db.Index('ix_activity_logs_action_created_at_id', 'action', 'created_at', 'id'),
+    )
+
     def to_dict(self):
         """Serialize activity log to dictionary"""
         return {
@@ -31,18 +37,46 @@ class ActivityLog(db.Model):
 
     @staticmethod
     def log_activity(user_id, action, description, entity_type=None, entity_id=None, ip_address=None, user_agent=None):
-        """Helper method to create activity log"""
-        log = ActivityLog(
-            user_id=user_id,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            description=description,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.session.add(log)
-        return log
+        """Helper method to record an activity through the configured audit sink"""
+        from app.utils.audit import get_audit_sink, SessionAuditSink
+
+        entry = {
+            'user_id': user_id,
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'description': description,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': datetime.utcnow()
+        }
+
+        sink = get_audit_sink() or SessionAuditSink(None)
+        return sink.write(entry)
+
+    @staticmethod
+    def log_activities(entries, ip_address=None, user_agent=None):
+        """
+        Record many activities at once (bulk INSERT or one batch for the buffered sink)
+        Each entry is a dict of log_activity's user_id, action, description,
+        entity_type and entity_id.
+        """
+        from app.utils.audit import get_audit_sink, SessionAuditSink
+
+        created_at = datetime.utcnow()
+        rows = [{
+            'user_id': entry['user_id'],
+            'action': entry['action'],
+            'entity_type': entry.get('entity_type'),
+            'entity_id': entry.get('entity_id'),
+            'description': entry['description'],
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': created_at
+        } for entry in entries]
+
+        sink = get_audit_sink() or SessionAuditSink(None)
+        sink.write_many(rows)
 
     def __repr__(self):
         return f'<ActivityLog {self.action} by User {self.user_id}>'
@@ -12,26 +12,64 @@ class Cart(db.Model):
     # Relationships
     items = db.relationship('CartItem', backref='cart', lazy='dynamic', cascade='all, delete-orphan')
 
-    def to_dict(self):
-        """Serialize cart to dictionary"""
-        items = self.items.all()
-        total = sum(item.quantity * float(item.product.price) for item in items if item.product)
+    def summary(self):
+        """Item count and total computed in SQL, for badges and mutation responses"""
+        from app.models.cart_item import CartItem
+        from app.models.farmer_product import FarmerProduct
+
+        item_count, total = db.session.query(
+            db.func.count(CartItem.id),
+            db.func.coalesce(db.func.sum(CartItem.quantity * FarmerProduct.price), 0)
+        ).join(FarmerProduct, FarmerProduct.id == CartItem.product_id).filter(
+            CartItem.cart_id == self.id
+        ).one()
 
         return {
             'id': self.id,
             'buyer_id': self.buyer_id,
-            'items': [item.to_dict() for item in items],
-            'item_count': len(items),
-            'total': total,
+            'item_count': item_count,
+            'total': float(total)
+        }
+
+    def load_items(self):
+        """Cart items with their product, category and farmer in one query"""
+        from app.models.cart_item import CartItem
+        from app.models.farmer_product import FarmerProduct
+
+        product = db.joinedload(CartItem.product)
+        return self.items.options(
+            product.joinedload(FarmerProduct.category),
+            product.joinedload(FarmerProduct.farmer)
+        ).order_by(CartItem.id).all()
+
+    def to_dict(self, view='full'):
+        """
+        Serialize cart to dictionary
+        view='summary' returns only the id, item count and total; the full view
+        adds the items in a fixed number of queries (items with products, then
+        one query for every product's primary image).
+        """
+        from app.models.farmer_product import FarmerProduct
+
+        data = self.summary()
+        if view == 'summary':
+            return data
+
+        items = self.load_items()
+        images = FarmerProduct.primary_images([item.product_id for item in items])
+
+        data.update({
+            'items': [item.to_dict(images=images.get(item.product_id, [])) for item in items],
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
-        }
+        })
+        return data
 
     def clear(self):
-        """Clear all items from cart"""
-        # Use the relationship to delete all items
-        for item in self.items.all():
-            db.session.delete(item)
+        """Clear all items from cart with a single DELETE"""
+        from app.models.cart_item import CartItem
+
+        CartItem.query.filter_by(cart_id=self.id).delete(synchronize_session=False)
 
     def __repr__(self):
         return f'<Cart {self.id} for Buyer {self.buyer_id}>'
@@ -14,13 +14,13 @@ class CartItem(db.Model):
     # Unique constraint to prevent duplicate products in same cart
     __table_args__ = (db.UniqueConstraint('cart_id', 'product_id', name='_cart_product_uc'),)
 
-    def to_dict(self):
-        """Serialize cart item to dictionary"""
+    def to_dict(self, images=None):
+        """Serialize cart item to dictionary (images: the product's images when already loaded)"""
         return {
             'id': self.id,
             'cart_id': self.cart_id,
             'product_id': self.product_id,
-            'product': self.product.to_dict(include_farmer=True) if self.product else None,
+            'product': self.product.to_dict(include_farmer=True, images=images) if self.product else None,
             'quantity': self.quantity,
             'subtotal': self.quantity * float(self.product.price) if self.product else 0,
             'created_at': self.created_at.isoformat(),
@@ -14,14 +14,35 @@ class Category(db.Model):
     # Relationships
     products = db.relationship('FarmerProduct', backref='category', lazy='dynamic')
 
-    def to_dict(self):
+    @staticmethod
+    def to_dict_many(categories):
+        """Serialize a list of categories with one grouped query for all product counts"""
+        from app.models.farmer_product import FarmerProduct
+
+        counts = {}
+        if categories:
+            counts = dict(db.session.query(
+                FarmerProduct.category_id,
+                db.func.count(FarmerProduct.id)
+            ).filter(
+                FarmerProduct.category_id.in_([category.id for category in categories]),
+                FarmerProduct.is_approved == True,
+                FarmerProduct.is_active == True
+            ).group_by(FarmerProduct.category_id).all())
+
+        return [category.to_dict(product_count=counts.get(category.id, 0)) for category in categories]
+
+    def to_dict(self, product_count=None):
         """Serialize category to dictionary"""
+        if product_count is None:
+            product_count = self.products.filter_by(is_approved=True, is_active=True).count()
+
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'is_active': self.is_active,
-            'product_count': self.products.filter_by(is_approved=True, is_active=True).count(),
+            'product_count': product_count,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -0,0 +1,135 @@
+from app import db
+from app.models.message import Message
+from app.models.unread_counter import UnreadCounter
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+
+class Conversation(db.Model):
+    """
+    Per-participant summary of a message thread
+    One row per (thread, user), maintained on send/read/delete so the
+    conversation list is a single indexed query.
+    """
+    __tablename__ = 'conversations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    thread_id = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    other_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    last_message_id = db.Column(db.Integer, db.ForeignKey('messages.id', ondelete='SET NULL'), nullable=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    last_activity_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('thread_id', 'user_id', name='_conversation_thread_user_uc'),
+        db.Index('ix_conversations_user_activity', 'user_id', 'last_activity_at', 'id'),
+    )
+
+    # Relationships
+    user = db.relationship('User', foreign_keys=[user_id])
+    other_user = db.relationship('User', foreign_keys=[other_user_id])
+    last_message = db.relationship('Message', foreign_keys=[last_message_id])
+
+    def to_dict(self):
+        """Serialize conversation to dictionary"""
+        return {
+            'thread_id': self.thread_id,
+            'other_user_id': self.other_user_id,
+            'other_user_name': self.other_user.display_name if self.other_user else None,
+            'other_user_role': self.other_user.role if self.other_user else None,
+            'last_message': self.last_message.to_dict() if self.last_message else None,
+            'unread_count': self.unread_count,
+            'last_activity_at': self.last_activity_at.isoformat()
+        }
+
+    @staticmethod
+    def record_message(message):
+        """Upsert both participants' summaries for a newly flushed message"""
+        rows = {
+            message.sender_id: {
+                'thread_id': message.thread_id,
+                'user_id': message.sender_id,
+                'other_user_id': message.receiver_id,
+                'last_message_id': message.id,
+                'unread_count': 0,
+                'last_activity_at': message.created_at
+            }
+        }
+        # Receiver row last, so a message to oneself counts as unread
+        rows[message.receiver_id] = {
+            'thread_id': message.thread_id,
+            'user_id': message.receiver_id,
+            'other_user_id': message.sender_id,
+            'last_message_id': message.id,
+            'unread_count': 1,
+            'last_activity_at': message.created_at
+        }
+
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+        stmt = insert(Conversation).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['thread_id', 'user_id'],
+            set_={
+                'last_message_id': stmt.excluded.last_message_id,
+                'last_activity_at': stmt.excluded.last_activity_at,
+                'unread_count': Conversation.unread_count + stmt.excluded.unread_count
+            }
+        )
+        db.session.execute(stmt)
+        UnreadCounter.increment(message.receiver_id)
+
+    @staticmethod
+    def mark_read(thread_id, user_id, count):
+        """Subtract messages a user has just read from their unread count"""
+        if count <= 0:
+            return
+        Conversation.query.filter_by(thread_id=thread_id, user_id=user_id).update({
+            Conversation.unread_count: db.case(
+                (Conversation.unread_count > count, Conversation.unread_count - count),
+                else_=0
+            )
+        }, synchronize_session=False)
+        UnreadCounter.decrement(user_id, count)
+
+    @staticmethod
+    def refresh_thread(thread_id):
+        """Recompute a thread's summaries and its participants' unread counters (after deletes)"""
+        participants = [row[0] for row in db.session.query(Conversation.user_id).filter_by(thread_id=thread_id)]
+        if participants:
+            UnreadCounter.reconcile(participants)
+
+        Conversation.query.filter_by(thread_id=thread_id).delete(synchronize_session=False)
+
+        last = Message.query.filter_by(thread_id=thread_id).order_by(
+            Message.created_at.desc(), Message.id.desc()
+        ).first()
+        if not last:
+            return
+
+        unread = dict(db.session.query(
+            Message.receiver_id, db.func.count(Message.id)
+        ).filter_by(thread_id=thread_id, is_read=False).group_by(Message.receiver_id).all())
+
+        participants = {last.sender_id: last.receiver_id, last.receiver_id: last.sender_id}
+        db.session.execute(db.insert(Conversation), [{
+            'thread_id': thread_id,
+            'user_id': user_id,
+            'other_user_id': other_user_id,
+            'last_message_id': last.id,
+            'unread_count': unread.get(user_id, 0),
+            'last_activity_at': last.created_at
+        } for user_id, other_user_id in participants.items()])
+
+    @staticmethod
+    def rebuild():
+        """Recompute every conversation summary from the messages table"""
+        Conversation.query.delete(synchronize_session=False)
+
+        thread_ids = [row[0] for row in db.session.query(Message.thread_id).distinct()]
+        for thread_id in thread_ids:
+            Conversation.refresh_thread(thread_id)
+
+        UnreadCounter.reconcile()
+
+    def __repr__(self):
+        return f'<Conversation {self.thread_id} for User {self.user_id}>'
@@ -1,5 +1,12 @@
 from app import db
+from app.models.product_image import ProductImage
 from datetime import datetime
+from sqlalchemy import DDL, event, func, literal_column
+
+# Full-text search document for a product. The same expression backs the GIN
+# index and the search queries, so PostgreSQL can match the index.
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+SEARCH_FTS_TABLE = 'farmer_products_fts'
 
 class FarmerProduct(db.Model):
     __tablename__ = 'farmer_products'
@@ -39,8 +46,65 @@ class FarmerProduct(db.Model):
     cart_items = db.relationship('CartItem', backref='product', lazy='dynamic', cascade='all, delete-orphan')
     order_items = db.relationship('OrderItem', backref='product', lazy='dynamic')
 
-    def to_dict(self, include_farmer=False):
+    @classmethod
+    def search_vector(cls):
+        """tsvector expression used by the PostgreSQL full-text index"""
+        return func.to_tsvector(
+            SEARCH_CONFIG,
+            func.coalesce(cls.name, literal_column("''")).op('||')(literal_column("' '")).op('||')(
+                func.coalesce(cls.description, literal_column("''"))
+            )
+        )
+
+    @staticmethod
+    def listing_options(include_farmer=False):
+        """Eager-loading options for queries whose results are serialized"""
+        options = [db.joinedload(FarmerProduct.category)]
+        if include_farmer:
+            options.append(db.joinedload(FarmerProduct.farmer))
+        return options
+
+    @staticmethod
+    def to_dict_many(products, include_farmer=False):
+        """
+        Serialize a list of products, loading all of their images in one query
+        Combine with listing_options() so category/farmer are not lazy-loaded
+        """
+        images_by_product = {product.id: [] for product in products}
+
+        if images_by_product:
+            images = ProductImage.query.filter(
+                ProductImage.product_id.in_(images_by_product.keys())
+            ).order_by(ProductImage.id).all()
+            for image in images:
+                images_by_product[image.product_id].append(image)
+
+        return [
+            product.to_dict(include_farmer=include_farmer, images=images_by_product[product.id])
+            for product in products
+        ]
+
+    @staticmethod
+    def primary_images(product_ids):
+        """
+        {product_id: [primary image]} for many products in one query
+        Falls back to the first image when a product has no primary one.
+        """
+        images_by_product = {}
+        if product_ids:
+            images = ProductImage.query.filter(
+                ProductImage.product_id.in_(set(product_ids))
+            ).order_by(ProductImage.is_primary.desc(), ProductImage.id).all()
+            for image in images:
+                images_by_product.setdefault(image.product_id, [image])
+
+        return images_by_product
+
+    def to_dict(self, include_farmer=False, images=None):
         """Serialize product to dictionary"""
+        if images is None:
+            images = self.images.all()
+
         data = {
             'id': self.id,
             'farmer_id': self.farmer_id,
@@ -59,7 +123,7 @@ class FarmerProduct(db.Model):
             'is_active': self.is_active,
             'is_out_of_stock': self.is_out_of_stock,
             'view_count': self.view_count,
-            'images': [img.to_dict() for img in self.images.all()],
+            'images': [img.to_dict() for img in images],
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'approved_at': self.approved_at.isoformat() if self.approved_at else None
@@ -86,3 +150,38 @@ class FarmerProduct(db.Model):
 
     def __repr__(self):
         return f'<FarmerProduct {self.name}>'
+
+
+# PostgreSQL: GIN index over the search document
+SEARCH_INDEX = db.Index(
+    'ix_farmer_products_search',
+    FarmerProduct.search_vector(),
+    postgresql_using='gin'
+).ddl_if(dialect='postgresql')
+# Pure expression indexes can't infer their table, so attach it explicitly
+FarmerProduct.__table__.append_constraint(SEARCH_INDEX)
+
+# SQLite: FTS5 shadow table over farmer_products, kept in sync by triggers
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} USING fts5("
+    f"name, description, content='farmer_products', content_rowid='id', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_ai AFTER INSERT ON farmer_products BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_ad AFTER DELETE ON farmer_products BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_au AFTER UPDATE OF name, description ON farmer_products BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {SEARCH_FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(FarmerProduct.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+event.listen(
+    FarmerProduct.__table__,
+    'before_drop',
+    DDL(f'DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}').execute_if(dialect='sqlite')
+)
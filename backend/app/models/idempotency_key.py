@@ -0,0 +1,14 @@
+from app import db
+
+class IdempotencyKey(db.Model):
+    """
+    Stored state of one Idempotency-Key, shared by every worker
+    `key` is the hashed (user, endpoint, key) scope and `record` the JSON
+    state kept by app.utils.idempotency; rows past expires_at are dead and
+    are replaced on the next reservation or removed by purge-idempotency-keys.
+    """
+    __tablename__ = 'idempotency_keys'
+
+    key = db.Column(db.String(64), primary_key=True)
+    record = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -30,20 +30,84 @@ class Message(db.Model):
     receiver = db.relationship('User', foreign_keys=[receiver_id], backref='received_messages')
     replies = db.relationship('Message', backref=db.backref('parent', remote_side=[id]), lazy='dynamic')
 
-    def to_dict(self, include_thread=False):
-        """Serialize message to dictionary"""
+    @staticmethod
+    def load_replies(parent_ids, limit=None):
+        """
+        Replies of many top-level messages in one query
+        Returns ({parent_id: [replies oldest first]}, {parent_id: reply count}).
+        With a limit only the newest `limit` replies of each thread are loaded
+        (at least one, since the count rides on the loaded rows); the count is
+        always the full number of replies.
+        """
+        replies = {parent_id: [] for parent_id in parent_ids}
+        counts = dict.fromkeys(parent_ids, 0)
+        if not replies:
+            return replies, counts
+
+        position = db.func.row_number().over(
+            partition_by=Message.parent_message_id,
+            order_by=(Message.created_at.desc(), Message.id.desc())
+        ).label('position')
+        total = db.func.count().over(partition_by=Message.parent_message_id).label('total')
+
+        ranked = db.select(Message.id, position, total).where(
+            Message.parent_message_id.in_(replies.keys())
+        ).subquery()
+
+        query = db.session.query(Message, ranked.c.total).join(ranked, ranked.c.id == Message.id)
+        if limit is not None:
+            query = query.filter(ranked.c.position <= max(1, limit))
+
+        for reply, reply_total in query.order_by(Message.created_at.asc(), Message.id.asc()):
+            replies[reply.parent_message_id].append(reply)
+            counts[reply.parent_message_id] = reply_total
+
+        return replies, counts
+
+    @staticmethod
+    def to_dict_many(messages, include_thread=False, reply_limit=None):
+        """
+        Serialize a page of messages with a constant number of queries
+        Replies are loaded in one query (capped per thread by reply_limit) and
+        every sender/receiver name in one more.
+        """
+        from app.models.user import User
+
+        replies, counts = {}, {}
+        if include_thread:
+            replies, counts = Message.load_replies([message.id for message in messages], reply_limit)
+
+        everyone = list(messages) + [reply for thread in replies.values() for reply in thread]
+        names = User.display_names(
+            {message.sender_id for message in everyone} | {message.receiver_id for message in everyone}
+        )
+
+        results = []
+        for message in messages:
+            data = message.to_dict(names=names)
+            if include_thread:
+                data['replies'] = [reply.to_dict(names=names) for reply in replies[message.id]]
+                data['reply_count'] = counts[message.id]
+            results.append(data)
+        return results
+
+    def to_dict(self, include_thread=False, names=None):
+        """Serialize message to dictionary (names: {user_id: (display_name, role)} from User.display_names)"""
+        if names is not None and self.sender_id in names and self.receiver_id in names:
+            sender_name, sender_role = names[self.sender_id]
+            receiver_name, receiver_role = names[self.receiver_id]
+        else:
+            sender_name, sender_role = self.sender.display_name, self.sender.role
+            receiver_name, receiver_role = self.receiver.display_name, self.receiver.role
+
         data = {
             'id': self.id,
             'sender_id': self.sender_id,
-            'sender_name': self.sender.buyer_profile.full_name if self.sender.role == 'buyer' and self.sender.buyer_profile
-                          else self.sender.farmer_profile.full_name if self.sender.role == 'farmer' and self.sender.farmer_profile
-                          else 'Admin',
-            'sender_role': self.sender.role,
+            'sender_name': sender_name,
+            'sender_role': sender_role,
             'receiver_id': self.receiver_id,
-            'receiver_name': self.receiver.buyer_profile.full_name if self.receiver.role == 'buyer' and self.receiver.buyer_profile
-                            else self.receiver.farmer_profile.full_name if self.receiver.role == 'farmer' and self.receiver.farmer_profile
-                            else 'Admin',
-            'receiver_role': self.receiver.role,
+            'receiver_name': receiver_name,
+            'receiver_role': receiver_role,
             'subject': self.subject,
             'message': self.message,
             'thread_id': self.thread_id,
@@ -55,7 +119,7 @@ class Message(db.Model):
 
         if include_thread:
             data['replies'] = [reply.to_dict() for reply in self.replies.order_by(Message.created_at.asc()).all()]
-            data['reply_count'] = self.replies.count()
+            data['reply_count'] = len(data['replies'])
 
         return data
 
@@ -66,12 +130,46 @@ class Message(db.Model):
         ids = sorted([user1_id, user2_id])
         return f'thread-{ids[0]}-{ids[1]}'
 
+    @staticmethod
+    def mark_thread_read(thread_id, user_id, up_to_message_id=None):
+        """
+        Mark every unread message a user received in a thread as read with one UPDATE
+        Only messages with id <= up_to_message_id are marked when it is given.
+        Returns the number of messages marked; the caller commits.
+        """
+        from app.models.conversation import Conversation
+
+        query = Message.query.filter(
+            Message.thread_id == thread_id,
+            Message.receiver_id == user_id,
+            Message.is_read == False
+        )
+        if up_to_message_id is not None:
+            query = query.filter(Message.id <= up_to_message_id)
+
+        marked = query.update({
+            Message.is_read: True,
+            Message.read_at: datetime.utcnow()
+        }, synchronize_session='evaluate')
+
+        Conversation.mark_read(thread_id, user_id, marked)
+        return marked
+
     def mark_as_read(self):
-        """Mark message as read"""
-        if not self.is_read:
-            self.is_read = True
-            self.read_at = datetime.utcnow()
-            db.session.commit()
+        """Mark message as read; returns whether it was unread (the caller commits)"""
+        from app.models.conversation import Conversation
+
+        if self.is_read:
+            return False
+
+        # Conditional UPDATE so concurrent readers only count the read once
+        marked = Message.query.filter_by(id=self.id, is_read=False).update({
+            Message.is_read: True,
+            Message.read_at: datetime.utcnow()
+        }, synchronize_session='evaluate')
+
+        Conversation.mark_read(self.thread_id, self.receiver_id, marked)
+        return marked > 0
 
     def __repr__(self):
         return f'<Message {self.id} from User {self.sender_id} to User {self.receiver_id}>'
@@ -1,4 +1,5 @@
 from app import db
+import secrets
 from datetime import datetime
 
 class Order(db.Model):
@@ -33,8 +34,13 @@ class Order(db.Model):
     # Relationships
     items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
 
+    def load_items(self):
+        """Order items with their farmer in one query"""
+        from app.models.order_item import OrderItem
+        return self.items.options(db.joinedload(OrderItem.farmer)).order_by(OrderItem.id).all()
+
     def to_dict(self, include_items=True):
-        """Serialize order to dictionary"""
+        """Serialize order to dictionary (the items and their farmers in one query)"""
         data = {
             'id': self.id,
             'buyer_id': self.buyer_id,
@@ -56,16 +62,20 @@ class Order(db.Model):
         }
 
         if include_items:
-            data['items'] = [item.to_dict() for item in self.items.all()]
-            data['item_count'] = self.items.count()
+            items = self.load_items()
+            data['items'] = [item.to_dict() for item in items]
+            data['item_count'] = len(items)
 
         return data
 
-    def generate_order_number(self):
-        """Generate unique order number"""
-        from datetime import datetime
+    @staticmethod
+    def generate_order_number():
+        """
+        Generate unique order number before the order is inserted
+        A random suffix replaces the row id, so no second UPDATE is needed.
+        """
         timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        return f'ORD-{timestamp}-{self.id}'
+        return f'ORD-{timestamp}-{secrets.token_hex(4).upper()}'
 
     def __repr__(self):
         return f'<Order {self.order_number}>'
@@ -0,0 +1,62 @@
+from app import db
+from app.models.message import Message
+from sqlalchemy.dialects import postgresql, sqlite
+
+class UnreadCounter(db.Model):
+    """
+    Number of unread messages a user has received
+    Adjusted in the same transaction as every send/read/delete so reading
+    it is a primary-key lookup; reconcile() recomputes it from messages.
+    """
+    __tablename__ = 'unread_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def get_count(user_id):
+        """Current unread total of a user"""
+        count = db.session.query(UnreadCounter.unread_count).filter_by(user_id=user_id).scalar()
+        return count or 0
+
+    @staticmethod
+    def increment(user_id, count=1):
+        """Add newly received messages to a user's counter"""
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+        stmt = insert(UnreadCounter).values(user_id=user_id, unread_count=count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={'unread_count': UnreadCounter.unread_count + stmt.excluded.unread_count}
+        )
+        db.session.execute(stmt)
+
+    @staticmethod
+    def decrement(user_id, count):
+        """Subtract messages a user has just read, never going below zero"""
+        if count <= 0:
+            return
+        UnreadCounter.query.filter_by(user_id=user_id).update({
+            UnreadCounter.unread_count: db.case(
+                (UnreadCounter.unread_count > count, UnreadCounter.unread_count - count),
+                else_=0
+            )
+        }, synchronize_session=False)
+
+    @staticmethod
+    def reconcile(user_ids=None):
+        """Recompute counters from the messages table (all users, or only user_ids)"""
+        counters = UnreadCounter.query
+        unread = db.session.query(Message.receiver_id, db.func.count(Message.id)).filter(Message.is_read == False)
+        if user_ids is not None:
+            counters = counters.filter(UnreadCounter.user_id.in_(user_ids))
+            unread = unread.filter(Message.receiver_id.in_(user_ids))
+
+        counters.delete(synchronize_session=False)
+        db.session.execute(
+            db.insert(UnreadCounter).from_select(
+                ['user_id', 'unread_count'], unread.group_by(Message.receiver_id)
+            )
+        )
+
+    def __repr__(self):
+        return f'<UnreadCounter User {self.user_id}: {self.unread_count}>'
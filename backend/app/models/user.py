@@ -26,6 +26,41 @@ class User(db.Model):
         """Check password against hash"""
         return check_password_hash(self.password_hash, password)
 
+    @property
+    def display_name(self):
+        """Profile name for buyers/farmers, 'Admin' otherwise"""
+        if self.role == 'buyer' and self.buyer_profile:
+            return self.buyer_profile.full_name
+        if self.role == 'farmer' and self.farmer_profile:
+            return self.farmer_profile.full_name
+        return 'Admin'
+
+    @staticmethod
+    def display_names(user_ids):
+        """{user_id: (display_name, role)} for many users in one query"""
+        from app.models.farmer_profile import FarmerProfile
+        from app.models.buyer_profile import BuyerProfile
+
+        if not user_ids:
+            return {}
+
+        rows = db.session.query(
+            User.id, User.role, BuyerProfile.full_name, FarmerProfile.full_name
+        ).outerjoin(BuyerProfile, BuyerProfile.user_id == User.id).outerjoin(
+            FarmerProfile, FarmerProfile.user_id == User.id
+        ).filter(User.id.in_(set(user_ids))).all()
+
+        names = {}
+        for user_id, role, buyer_name, farmer_name in rows:
+            if role == 'buyer' and buyer_name is not None:
+                name = buyer_name
+            elif role == 'farmer' and farmer_name is not None:
+                name = farmer_name
+            else:
+                name = 'Admin'
+            names[user_id] = (name, role)
+        return names
+
     def to_dict(self, include_profile=True):
         """Serialize user to dictionary"""
         data = {
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import get_jwt_identity
 from app import db
 from app.models.user import User
@@ -11,6 +11,14 @@ from app.models.category import Category
 from app.models.activity_log import ActivityLog
 from app.utils.decorators import admin_required
 from app.utils.helpers import get_client_ip
+from app.utils.pagination import keyset_paginate, InvalidCursor
+from app.utils.db_routing import use_replica
+from app.utils.audit import get_audit_sink
+from app.utils.cache import invalidate_cache, CATALOG_CACHE
+from app.utils.stats import compute_dashboard_stats
+from app.utils.auth import invalidate_user_status
+from app.utils.idempotency import idempotent
+from app.utils.stock import reserve_stock, lock_stock, order_quantities, claim_pending_order, InsufficientStock
 from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__)
@@ -79,6 +87,7 @@ def create_farmer():
 
 @admin_bp.route('/farmers', methods=['GET'])
 @admin_required
+@use_replica
 def get_all_farmers():
     """Get all farmers"""
     page = request.args.get('page', 1, type=int)
@@ -110,6 +119,7 @@ def get_all_farmers():
 
 @admin_bp.route('/buyers', methods=['GET'])
 @admin_required
+@use_replica
 def get_all_buyers():
     """Get all buyers"""
     page = request.args.get('page', 1, type=int)
@@ -164,6 +174,9 @@ def toggle_user_status(user_id):
 
     db.session.commit()
 
+    # Takes effect on the user's next request instead of after the cache TTL
+    invalidate_user_status(user.id)
+
     return jsonify({
         'message': f'User {status} successfully',
         'user': user.to_dict()
@@ -172,6 +185,7 @@ def toggle_user_status(user_id):
 
 @admin_bp.route('/products/pending', methods=['GET'])
 @admin_required
+@use_replica
 def get_pending_products():
     """Get all pending products awaiting approval"""
     page = request.args.get('page', 1, type=int)
@@ -180,12 +194,14 @@ def get_pending_products():
     pagination = FarmerProduct.query.filter_by(
         is_approved=False,
         is_active=True
+    ).options(
+        *FarmerProduct.listing_options(include_farmer=True)
     ).order_by(FarmerProduct.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
 
     return jsonify({
-        'products': [product.to_dict(include_farmer=True) for product in pagination.items],
+        'products': FarmerProduct.to_dict_many(pagination.items, include_farmer=True),
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page
@@ -217,6 +233,7 @@ def approve_product(product_id):
     )
 
     db.session.commit()
+    invalidate_cache(CATALOG_CACHE)
 
     return jsonify({
         'message': 'Product approved successfully',
@@ -246,12 +263,14 @@ def reject_product(product_id):
 
     db.session.delete(product)
     db.session.commit()
+    invalidate_cache(CATALOG_CACHE)
 
     return jsonify({'message': 'Product rejected and deleted successfully'}), 200
 
 
 @admin_bp.route('/orders/pending', methods=['GET'])
 @admin_required
+@use_replica
 def get_pending_orders():
     """Get all pending orders awaiting approval"""
     page = request.args.get('page', 1, type=int)
@@ -271,6 +290,7 @@ def get_pending_orders():
 
 @admin_bp.route('/orders/<int:order_id>/approve', methods=['PATCH'])
 @admin_required
+@idempotent
 def approve_order(order_id):
     """
     Approve order and deduct stock from farmer products
@@ -283,42 +303,38 @@ def approve_order(order_id):
         return jsonify({'message': f'Order is already {order.status}'}), 400
 
     try:
-        # Get all order items
-        order_items = order.items.all()
-
-        # Validate stock availability and deduct stock
-        for item in order_items:
-            product = FarmerProduct.query.get(item.product_id)
-
-            if not product:
-                return jsonify({
-                    'message': f'Product {item.product_name} not found'
-                }), 404
+        # Claim the order first; a concurrent approval of the same order waits
+        # on this row and then finds it no longer pending
+        if not claim_pending_order(order.id, status='approved', approved_at=datetime.utcnow()):
+            db.session.rollback()
+            db.session.refresh(order)
+            return jsonify({'message': f'Order is already {order.status}'}), 409
 
-            # Check if enough stock is available
-            if product.quantity < item.quantity:
-                return jsonify({
-                    'message': f'Insufficient stock for {product.name}. Available: {product.quantity}, Requested: {item.quantity}'
-                }), 400
+        order_items = order.items.all()
 
-            # Deduct stock quantity
-            product.update_stock(-item.quantity)
+        # Check and deduct stock in one conditional UPDATE per product
+        try:
+            reserve_stock(order_quantities(order_items))
+        except InsufficientStock as e:
+            db.session.rollback()
+            if e.available is None:
+                return jsonify({'message': f'Product {e.product_id} not found'}), 404
+            return jsonify({
+                'message': f'Insufficient stock for {e.name}. Available: {e.available}, Requested: {e.requested}'
+            }), 400
 
+        for item in order_items:
             # Log stock deduction
             ActivityLog.log_activity(
                 user_id=admin_id,
                 action='stock_deduction',
-                description=f'Stock deducted: {item.quantity} {product.unit} of {product.name} (Order #{order.order_number})',
+                description=f'Stock deducted: {item.quantity} {item.unit} of {item.product_name} (Order #{order.order_number})',
                 entity_type='product',
-                entity_id=product.id,
+                entity_id=item.product_id,
                 ip_address=get_client_ip(),
                 user_agent=request.headers.get('User-Agent')
             )
 
-        # Update order status
-        order.status = 'approved'
-        order.approved_at = datetime.utcnow()
-
         # Log order approval
         ActivityLog.log_activity(
             user_id=admin_id,
@@ -331,6 +347,7 @@ def approve_order(order_id):
         )
 
         db.session.commit()
+        invalidate_cache(CATALOG_CACHE)
 
         return jsonify({
             'message': 'Order approved and stock deducted successfully',
@@ -342,6 +359,121 @@ def approve_order(order_id):
         return jsonify({'message': 'Error approving order', 'error': str(e)}), 500
 
 
+@admin_bp.route('/orders/approve-batch', methods=['POST'])
+@admin_required
+@idempotent
+def approve_orders_batch():
+    """
+    Approve many pending orders in one transaction
+    Body: {"order_ids": [...]}. Orders are allocated oldest id first against
+    the locked stock; an order that cannot be covered in full is reported as
+    failed and the rest are approved. Stock is deducted with one UPDATE per
+    product for the combined quantity of every approved order.
+    """
+    admin_id = int(get_jwt_identity())  # Convert string to int
+    data = request.get_json() or {}
+    order_ids = data.get('order_ids')
+    limit = current_app.config.get('ORDER_BATCH_APPROVE_LIMIT', 500)
+
+    # bool is an int subclass; true/false must not be taken as order 1/0
+    valid_ids = isinstance(order_ids, list) and all(isinstance(i, int) and not isinstance(i, bool) for i in order_ids)
+    if not valid_ids or not order_ids:
+        return jsonify({'message': 'order_ids must be a non-empty list of order IDs'}), 400
+
+    order_ids = sorted(set(order_ids))
+    if len(order_ids) > limit:
+        return jsonify({'message': f'At most {limit} orders can be approved at once'}), 400
+
+    try:
+        orders = Order.query.options(db.joinedload(Order.buyer)).filter(
+            Order.id.in_(order_ids)
+        ).order_by(Order.id).with_for_update(of=Order).all()
+        pending = [order for order in orders if order.status == 'pending']
+
+        results = {order_id: {'order_id': order_id, 'status': 'failed', 'message': 'Order not found'}
+                   for order_id in order_ids}
+        for order in orders:
+            if order.status != 'pending':
+                results[order.id]['message'] = f'Order is already {order.status}'
+
+        items_by_order = {order.id: [] for order in pending}
+        if pending:
+            for item in OrderItem.query.filter(OrderItem.order_id.in_(items_by_order.keys())).order_by(OrderItem.id):
+                items_by_order[item.order_id].append(item)
+
+        # Allocate the locked stock to orders, oldest first
+        stock = lock_stock({item.product_id for items in items_by_order.values() for item in items})
+        available = {product_id: quantity for product_id, (name, quantity) in stock.items()}
+        approved = []
+        for order in pending:
+            needed = order_quantities(items_by_order[order.id])
+            short = next((product_id for product_id, quantity in needed.items()
+                          if available.get(product_id, 0) < quantity), None)
+            if short is not None:
+                name = stock[short][0] if short in stock else f'product {short}'
+                results[order.id]['message'] = f'Insufficient stock for {name}'
+                continue
+
+            for product_id, quantity in needed.items():
+                available[product_id] -= quantity
+            approved.append(order)
+
+        if approved:
+            approved_at = datetime.utcnow()
+            claimed = db.session.execute(
+                Order.__table__.update()
+                .where(Order.id.in_([order.id for order in approved]), Order.status == 'pending')
+                .values(status='approved', approved_at=approved_at)
+            ).rowcount
+            if claimed != len(approved):
+                db.session.rollback()
+                return jsonify({'message': 'Some orders were changed by another request; retry the batch'}), 409
+
+            reserve_stock(order_quantities(item for order in approved for item in items_by_order[order.id]))
+
+            audit_entries = []
+            for order in approved:
+                for item in items_by_order[order.id]:
+                    audit_entries.append({
+                        'user_id': admin_id,
+                        'action': 'stock_deduction',
+                        'description': f'Stock deducted: {item.quantity} {item.unit} of {item.product_name} (Order #{order.order_number})',
+                        'entity_type': 'product',
+                        'entity_id': item.product_id
+                    })
+                audit_entries.append({
+                    'user_id': admin_id,
+                    'action': 'approve_order',
+                    'description': f'Admin approved order #{order.order_number} for buyer {order.buyer.full_name}',
+                    'entity_type': 'order',
+                    'entity_id': order.id
+                })
+                results[order.id] = {'order_id': order.id, 'status': 'approved', 'message': 'Order approved'}
+
+            ActivityLog.log_activities(audit_entries, ip_address=get_client_ip(),
+                                       user_agent=request.headers.get('User-Agent'))
+
+        db.session.commit()
+        if approved:
+            invalidate_cache(CATALOG_CACHE)
+
+        return jsonify({
+            'message': f'Approved {len(approved)} of {len(order_ids)} orders',
+            'approved': len(approved),
+            'failed': len(order_ids) - len(approved),
+            'results': [results[order_id] for order_id in order_ids]
+        }), 200
+
+    except InsufficientStock:
+        # Stock changed between the locked read and the update (possible on SQLite)
+        db.session.rollback()
+        return jsonify({'message': 'Stock changed during approval; retry the batch'}), 409
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error approving orders', 'error': str(e)}), 500
+
+
 @admin_bp.route('/orders/<int:order_id>/reject', methods=['PATCH'])
 @admin_required
 def reject_order(order_id):
@@ -378,11 +510,12 @@ def reject_order(order_id):
 
 @admin_bp.route('/categories', methods=['GET'])
 @admin_required
+@use_replica
 def get_categories():
     """Get all categories"""
     categories = Category.query.order_by(Category.name).all()
     return jsonify({
-        'categories': [cat.to_dict() for cat in categories]
+        'categories': Category.to_dict_many(categories)
     }), 200
 
 
@@ -419,6 +552,7 @@ def create_category():
         )
 
         db.session.commit()
+        invalidate_cache(CATALOG_CACHE)
 
         return jsonify({
             'message': 'Category created successfully',
@@ -457,6 +591,7 @@ def update_category(category_id):
     )
 
     db.session.commit()
+    invalidate_cache(CATALOG_CACHE)
 
     return jsonify({
         'message': 'Category updated successfully',
@@ -466,32 +601,15 @@ def update_category(category_id):
 
 @admin_bp.route('/dashboard/stats', methods=['GET'])
 @admin_required
+@use_replica
 def get_dashboard_stats():
     """Get admin dashboard statistics"""
-    stats = {
-        'total_farmers': User.query.filter_by(role='farmer').count(),
-        'active_farmers': User.query.filter_by(role='farmer', is_active=True).count(),
-        'total_buyers': User.query.filter_by(role='buyer').count(),
-        'active_buyers': User.query.filter_by(role='buyer', is_active=True).count(),
-        'total_products': FarmerProduct.query.count(),
-        'approved_products': FarmerProduct.query.filter_by(is_approved=True).count(),
-        'pending_products': FarmerProduct.query.filter_by(is_approved=False, is_active=True).count(),
-        'total_orders': Order.query.count(),
-        'pending_orders': Order.query.filter_by(status='pending').count(),
-        'approved_orders': Order.query.filter_by(status='approved').count(),
-        'rejected_orders': Order.query.filter_by(status='rejected').count(),
-        'total_categories': Category.query.count()
-    }
-
-    # Calculate total revenue from approved orders
-    approved_orders = Order.query.filter_by(status='approved').all()
-    stats['total_revenue'] = sum(float(order.total_amount) for order in approved_orders)
-
-    return jsonify(stats), 200
+    return jsonify(compute_dashboard_stats()), 200
 
 
 @admin_bp.route('/activity-logs', methods=['GET'])
 @admin_required
+@use_replica
 def get_activity_logs():
     """Get activity logs"""
     page = request.args.get('page', 1, type=int)
@@ -503,6 +621,20 @@ def get_activity_logs():
     if action:
         query = query.filter_by(action=action)
 
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        try:
+            keyset = keyset_paginate(query, [ActivityLog.created_at, ActivityLog.id], cursor, per_page,
+                                     with_total=include_total)
+        except InvalidCursor:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'logs': [log.to_dict() for log in keyset.items],
+            **keyset.meta()
+        }), 200
+
     pagination = query.order_by(ActivityLog.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -515,6 +647,22 @@ def get_activity_logs():
     }), 200
 
 
+@admin_bp.route('/audit/stats', methods=['GET'])
+@admin_required
+def get_audit_stats():
+    """Get audit log writer queue and throughput counters"""
+    sink = get_audit_sink()
+    return jsonify(sink.stats() if sink else {}), 200
+
+
+@admin_bp.route('/cache/stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """Get response cache hit/miss counters"""
+    cache = current_app.extensions.get('response_cache')
+    return jsonify(cache.stats() if cache else {}), 200
+
+
 @admin_bp.route('/migrate/buyer-profile-image', methods=['POST'])
 @admin_required
 def migrate_buyer_profile_image():
@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 from app import db
@@ -6,6 +7,9 @@ from app.models.buyer_profile import BuyerProfile
 from app.models.cart import Cart
 from app.models.activity_log import ActivityLog
 from app.utils.helpers import get_client_ip
+from app.utils.auth import user_claims, cache_user_status, current_user
+
+logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -65,7 +69,7 @@ def buyer_signup():
         db.session.commit()
 
         # Generate tokens (identity must be a string)
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
         refresh_token = create_refresh_token(identity=str(user.id))
 
         return jsonify({
@@ -98,12 +102,11 @@ def login():
         return jsonify({'message': 'Account is deactivated. Contact admin.'}), 403
 
     # Generate tokens (identity must be a string)
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
     refresh_token = create_refresh_token(identity=str(user.id))
+    cache_user_status(user)
 
-    print(f"[AUTH DEBUG] Login successful for user_id={user.id}, role={user.role}")
-    print(f"[AUTH DEBUG] Access token created: {access_token[:50]}...")
-    print(f"[AUTH DEBUG] Refresh token created: {refresh_token[:50]}...")
+    logger.info('Login successful', extra={'user_id': user.id, 'role': user.role})
 
     # Log activity
     ActivityLog.log_activity(
@@ -128,7 +131,16 @@ def login():
 def refresh():
     """Refresh access token using refresh token"""
     user_id = get_jwt_identity()  # Already a string, keep it as-is for token creation
-    access_token = create_access_token(identity=user_id)
+    user = User.query.get(int(user_id))
+
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+
+    if not user.is_active:
+        return jsonify({'message': 'Account is deactivated. Contact admin.'}), 403
+
+    # Re-issue with current claims
+    access_token = create_access_token(identity=user_id, additional_claims=user_claims(user))
 
     return jsonify({'access_token': access_token}), 200
 
@@ -137,8 +149,7 @@ def refresh():
 @jwt_required()
 def get_current_user():
     """Get current authenticated user"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user = current_user()
 
     if not user:
         return jsonify({'message': 'User not found'}), 404
@@ -1,12 +1,12 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity
+from flask import Blueprint, g, request, jsonify
 from app import db
-from app.models.user import User
 from app.models.buyer_profile import BuyerProfile
 from app.models.order import Order
 from app.models.activity_log import ActivityLog
 from app.utils.decorators import buyer_required
 from app.utils.helpers import get_client_ip
+from app.utils.pagination import keyset_paginate, InvalidCursor
+from app.utils.db_routing import use_replica
 
 buyer_bp = Blueprint('buyer', __name__)
 
@@ -14,27 +14,24 @@ buyer_bp = Blueprint('buyer', __name__)
 @buyer_required
 def get_profile():
     """Get buyer profile"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
-
-    if not user.buyer_profile:
+    if not g.buyer_profile_id:
         return jsonify({'message': 'Buyer profile not found'}), 404
 
-    return jsonify({'profile': user.buyer_profile.to_dict()}), 200
+    profile = BuyerProfile.query.get(g.buyer_profile_id)
+    return jsonify({'profile': profile.to_dict()}), 200
 
 
 @buyer_bp.route('/profile', methods=['PATCH'])
 @buyer_required
 def update_profile():
     """Update buyer profile"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
     data = request.get_json()
 
-    if not user.buyer_profile:
+    if not g.buyer_profile_id:
         return jsonify({'message': 'Buyer profile not found'}), 404
 
-    profile = user.buyer_profile
+    profile = BuyerProfile.query.get(g.buyer_profile_id)
 
     # Update fields
     if 'full_name' in data:
@@ -71,23 +68,35 @@ def update_profile():
 
 @buyer_bp.route('/orders', methods=['GET'])
 @buyer_required
+@use_replica
 def get_my_orders():
     """Get buyer's order history"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
-
-    if not user.buyer_profile:
+    if not g.buyer_profile_id:
         return jsonify({'message': 'Buyer profile not found'}), 404
 
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     status = request.args.get('status')  # 'pending', 'approved', 'rejected', etc.
 
-    query = Order.query.filter_by(buyer_id=user.buyer_profile.id)
+    query = Order.query.filter_by(buyer_id=g.buyer_profile_id)
 
     if status:
         query = query.filter_by(status=status)
 
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        try:
+            keyset = keyset_paginate(query, [Order.created_at, Order.id], cursor, per_page,
+                                     with_total=include_total)
+        except InvalidCursor:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'orders': [order.to_dict() for order in keyset.items],
+            **keyset.meta()
+        }), 200
+
     pagination = query.order_by(Order.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -104,12 +113,10 @@ def get_my_orders():
 @buyer_required
 def get_order(order_id):
     """Get specific order (buyer can only view own orders)"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
     order = Order.query.get_or_404(order_id)
 
     # Verify ownership
-    if order.buyer_id != user.buyer_profile.id:
+    if order.buyer_id != g.buyer_profile_id:
         return jsonify({'message': 'Access denied'}), 403
 
     return jsonify({'order': order.to_dict()}), 200
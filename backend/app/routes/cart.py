@@ -1,7 +1,5 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity
+from flask import Blueprint, g, request, jsonify
 from app import db
-from app.models.user import User
 from app.models.cart import Cart
 from app.models.cart_item import CartItem
 from app.models.farmer_product import FarmerProduct
@@ -11,40 +9,55 @@ from app.utils.helpers import get_client_ip
 
 cart_bp = Blueprint('cart', __name__)
 
+
+def get_buyer_cart():
+    """The current buyer's cart, or None"""
+    if not g.buyer_profile_id:
+        return None
+    return Cart.query.filter_by(buyer_id=g.buyer_profile_id).first()
+
+
+def serialize_cart(cart):
+    """Cart in the requested view: ?view=summary (count and total) or the full cart"""
+    return cart.to_dict(view=request.args.get('view', 'full'))
+
+
 @cart_bp.route('/', methods=['GET'])
 @buyer_required
 def get_cart():
-    """Get buyer's cart"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
-
-    if not user.buyer_profile:
+    """
+    Get buyer's cart
+    Pass ?view=summary for just the item count and total (e.g. a header badge)
+    """
+    if not g.buyer_profile_id:
         return jsonify({'message': 'Buyer profile not found'}), 404
 
+    cart = get_buyer_cart()
+
     # Auto-create cart if it doesn't exist
-    if not user.buyer_profile.cart:
-        cart = Cart(buyer_id=user.buyer_profile.id)
+    if not cart:
+        cart = Cart(buyer_id=g.buyer_profile_id)
         db.session.add(cart)
         db.session.commit()
-        return jsonify({'cart': cart.to_dict()}), 200
 
-    return jsonify({'cart': user.buyer_profile.cart.to_dict()}), 200
+    return jsonify({'cart': serialize_cart(cart)}), 200
 
 
 @cart_bp.route('/items', methods=['POST'])
 @buyer_required
 def add_to_cart():
     """Add item to cart"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
     data = request.get_json()
 
-    if not user.buyer_profile:
+    if not g.buyer_profile_id:
         return jsonify({'message': 'Buyer profile not found'}), 404
 
+    cart = get_buyer_cart()
+
     # Auto-create cart if it doesn't exist
-    if not user.buyer_profile.cart:
-        cart = Cart(buyer_id=user.buyer_profile.id)
+    if not cart:
+        cart = Cart(buyer_id=g.buyer_profile_id)
         db.session.add(cart)
         db.session.commit()
 
@@ -69,8 +82,6 @@ def add_to_cart():
             'message': f'Insufficient stock. Only {product.quantity} {product.unit} available'
         }), 400
 
-    cart = user.buyer_profile.cart
-
     try:
         # Check if product already in cart
         cart_item = CartItem.query.filter_by(
@@ -112,7 +123,7 @@ def add_to_cart():
 
         return jsonify({
             'message': 'Item added to cart successfully',
-            'cart': cart.to_dict()
+            'cart': serialize_cart(cart)
         }), 200
 
     except Exception as e:
@@ -124,17 +135,16 @@ def add_to_cart():
 @buyer_required
 def update_cart_item(cart_item_id):
     """Update cart item quantity"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
     data = request.get_json()
+    cart = get_buyer_cart()
 
-    if not user.buyer_profile or not user.buyer_profile.cart:
+    if not cart:
         return jsonify({'message': 'Cart not found'}), 404
 
     cart_item = CartItem.query.get_or_404(cart_item_id)
 
     # Verify ownership
-    if cart_item.cart_id != user.buyer_profile.cart.id:
+    if cart_item.cart_id != cart.id:
         return jsonify({'message': 'Access denied'}), 403
 
     if 'quantity' not in data:
@@ -154,7 +164,7 @@ def update_cart_item(cart_item_id):
 
     return jsonify({
         'message': 'Cart item updated successfully',
-        'cart': user.buyer_profile.cart.to_dict()
+        'cart': serialize_cart(cart)
     }), 200
 
 
@@ -162,16 +172,16 @@ def update_cart_item(cart_item_id):
 @buyer_required
 def remove_from_cart(cart_item_id):
     """Remove item from cart"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
+    cart = get_buyer_cart()
 
-    if not user.buyer_profile or not user.buyer_profile.cart:
+    if not cart:
         return jsonify({'message': 'Cart not found'}), 404
 
     cart_item = CartItem.query.get_or_404(cart_item_id)
 
     # Verify ownership
-    if cart_item.cart_id != user.buyer_profile.cart.id:
+    if cart_item.cart_id != cart.id:
         return jsonify({'message': 'Access denied'}), 403
 
     product_name = cart_item.product.name if cart_item.product else 'Unknown'
@@ -184,7 +194,7 @@ def remove_from_cart(cart_item_id):
         action='remove_from_cart',
         description=f'Removed {product_name} from cart',
         entity_type='cart',
-        entity_id=user.buyer_profile.cart.id,
+        entity_id=cart.id,
         ip_address=get_client_ip(),
         user_agent=request.headers.get('User-Agent')
     )
@@ -193,7 +203,7 @@ def remove_from_cart(cart_item_id):
 
     return jsonify({
         'message': 'Item removed from cart successfully',
-        'cart': user.buyer_profile.cart.to_dict()
+        'cart': serialize_cart(cart)
     }), 200
 
 
@@ -201,13 +211,12 @@ def remove_from_cart(cart_item_id):
 @buyer_required
 def clear_cart():
     """Clear all items from cart"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
+    cart = get_buyer_cart()
 
-    if not user.buyer_profile or not user.buyer_profile.cart:
+    if not cart:
         return jsonify({'message': 'Cart not found'}), 404
 
-    cart = user.buyer_profile.cart
     cart.clear()
 
     # Log activity
@@ -1,7 +1,5 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity
+from flask import Blueprint, g, request, jsonify
 from app import db
-from app.models.user import User
 from app.models.farmer_profile import FarmerProfile
 from app.models.farmer_product import FarmerProduct
 from app.models.product_image import ProductImage
@@ -10,6 +8,10 @@ from app.models.order_item import OrderItem
 from app.models.activity_log import ActivityLog
 from app.utils.decorators import farmer_required
 from app.utils.helpers import get_client_ip
+from app.utils.pagination import keyset_paginate, InvalidCursor
+from app.utils.db_routing import use_replica
+from app.utils.cache import invalidate_cache, CATALOG_CACHE
+from app.utils.stats import compute_farmer_analytics, compute_farmer_sales_series, SERIES_INTERVALS, SERIES_MAX_DAYS
 
 farmer_bp = Blueprint('farmer', __name__)
 
@@ -17,27 +19,24 @@ farmer_bp = Blueprint('farmer', __name__)
 @farmer_required
 def get_profile():
     """Get farmer profile"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
-
-    if not user.farmer_profile:
+    if not g.farmer_profile_id:
         return jsonify({'message': 'Farmer profile not found'}), 404
 
-    return jsonify({'profile': user.farmer_profile.to_dict()}), 200
+    profile = FarmerProfile.query.get(g.farmer_profile_id)
+    return jsonify({'profile': profile.to_dict()}), 200
 
 
 @farmer_bp.route('/profile', methods=['PATCH'])
 @farmer_required
 def update_profile():
     """Update farmer profile"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
     data = request.get_json()
 
-    if not user.farmer_profile:
+    if not g.farmer_profile_id:
         return jsonify({'message': 'Farmer profile not found'}), 404
 
-    profile = user.farmer_profile
+    profile = FarmerProfile.query.get(g.farmer_profile_id)
 
     # Update fields
     if 'full_name' in data:
@@ -63,6 +62,8 @@ def update_profile():
     )
 
     db.session.commit()
+    # Catalog responses carry the farmer's name and farm name
+    invalidate_cache(CATALOG_CACHE)
 
     return jsonify({
         'message': 'Profile updated successfully',
@@ -74,10 +75,9 @@ def update_profile():
 @farmer_required
 def get_my_products():
     """Get farmer's own products"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    farmer_id = g.farmer_profile_id
 
-    if not user.farmer_profile:
+    if not farmer_id:
         return jsonify({'message': 'Farmer profile not found'}), 404
 
     page = request.args.get('page', 1, type=int)
@@ -85,7 +85,7 @@ def get_my_products():
     status = request.args.get('status')  # 'approved', 'pending', 'all'
 
     query = FarmerProduct.query.filter_by(
-        farmer_id=user.farmer_profile.id,
+        farmer_id=farmer_id,
         is_active=True
     )
 
@@ -94,12 +94,12 @@ def get_my_products():
     elif status == 'pending':
         query = query.filter_by(is_approved=False)
 
-    pagination = query.order_by(FarmerProduct.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    pagination = query.options(*FarmerProduct.listing_options()).order_by(
+        FarmerProduct.created_at.desc()
+    ).paginate(page=page, per_page=per_page, error_out=False)
 
     return jsonify({
-        'products': [product.to_dict() for product in pagination.items],
+        'products': FarmerProduct.to_dict_many(pagination.items),
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page
@@ -110,11 +110,10 @@ def get_my_products():
 @farmer_required
 def create_product():
     """Create new product (pending admin approval)"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
     data = request.get_json()
 
-    if not user.farmer_profile:
+    if not g.farmer_profile_id:
         return jsonify({'message': 'Farmer profile not found'}), 404
 
     # Validate required fields
@@ -124,7 +123,7 @@ def create_product():
 
     try:
         product = FarmerProduct(
-            farmer_id=user.farmer_profile.id,
+            farmer_id=g.farmer_profile_id,
             category_id=data['category_id'],
             name=data['name'],
             description=data.get('description'),
@@ -178,12 +177,10 @@ def create_product():
 @farmer_required
 def get_product(product_id):
     """Get specific product (farmer can only view own products)"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
     product = FarmerProduct.query.get_or_404(product_id)
 
     # Verify ownership
-    if product.farmer_id != user.farmer_profile.id:
+    if product.farmer_id != g.farmer_profile_id:
         return jsonify({'message': 'Access denied'}), 403
 
     return jsonify({'product': product.to_dict()}), 200
@@ -193,13 +190,12 @@ def get_product(product_id):
 @farmer_required
 def update_product(product_id):
     """Update product (farmer can only update own products)"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
     product = FarmerProduct.query.get_or_404(product_id)
     data = request.get_json()
 
     # Verify ownership
-    if product.farmer_id != user.farmer_profile.id:
+    if product.farmer_id != g.farmer_profile_id:
         return jsonify({'message': 'Access denied'}), 403
 
     # Update fields
@@ -251,6 +247,7 @@ def update_product(product_id):
     )
 
     db.session.commit()
+    invalidate_cache(CATALOG_CACHE)
 
     return jsonify({
         'message': 'Product updated successfully',
@@ -262,12 +259,11 @@ def update_product(product_id):
 @farmer_required
 def delete_product(product_id):
     """Soft delete product (mark as inactive)"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
     product = FarmerProduct.query.get_or_404(product_id)
 
     # Verify ownership
-    if product.farmer_id != user.farmer_profile.id:
+    if product.farmer_id != g.farmer_profile_id:
         return jsonify({'message': 'Access denied'}), 403
 
     product.is_active = False
@@ -284,6 +280,7 @@ def delete_product(product_id):
     )
 
     db.session.commit()
+    invalidate_cache(CATALOG_CACHE)
 
     return jsonify({'message': 'Product deleted successfully'}), 200
 
@@ -295,10 +292,9 @@ def get_farmer_orders():
     Get orders for farmer's products
     Farmers can only see approved orders (after admin approval)
     """
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    farmer_id = g.farmer_profile_id
 
-    if not user.farmer_profile:
+    if not farmer_id:
         return jsonify({'message': 'Farmer profile not found'}), 404
 
     page = request.args.get('page', 1, type=int)
@@ -307,97 +303,74 @@ def get_farmer_orders():
 
     # Get orders containing farmer's products
     query = db.session.query(Order).join(OrderItem).filter(
-        OrderItem.farmer_id == user.farmer_profile.id,
+        OrderItem.farmer_id == farmer_id,
         Order.status == status
     ).distinct()
 
-    pagination = query.order_by(Order.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        try:
+            page_items = keyset_paginate(query, [Order.created_at, Order.id], cursor, per_page,
+                                         with_total=include_total)
+        except InvalidCursor:
+            return jsonify({'message': 'Invalid cursor'}), 400
+    else:
+        page_items = query.order_by(Order.created_at.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
 
     # Filter order items to show only this farmer's items
     orders_data = []
-    for order in pagination.items:
+    for order in page_items.items:
         order_dict = order.to_dict()
         # Filter items to only show this farmer's products
         order_dict['items'] = [
             item.to_dict() for item in order.items
-            if item.farmer_id == user.farmer_profile.id
+            if item.farmer_id == farmer_id
         ]
         orders_data.append(order_dict)
 
+    if cursor is not None:
+        return jsonify({'orders': orders_data, **page_items.meta()}), 200
+
     return jsonify({
         'orders': orders_data,
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'total': page_items.total,
+        'pages': page_items.pages,
         'current_page': page
     }), 200
 
 
 @farmer_bp.route('/analytics', methods=['GET'])
 @farmer_required
+@use_replica
 def get_analytics():
-    """Get farmer analytics"""
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    """
+    Get farmer analytics
+    Pass ?series=daily|weekly (and optionally days=1..366) for a revenue time series
+    """
+    farmer_id = g.farmer_profile_id
 
-    if not user.farmer_profile:
+    if not farmer_id:
         return jsonify({'message': 'Farmer profile not found'}), 404
 
-    farmer_id = user.farmer_profile.id
+    series = request.args.get('series')
+    days = request.args.get('days', 30, type=int)
 
-    # Product statistics
-    total_products = FarmerProduct.query.filter_by(
-        farmer_id=farmer_id,
-        is_active=True
-    ).count()
+    if series and series not in SERIES_INTERVALS:
+        return jsonify({'message': 'series must be one of: daily, weekly'}), 400
 
-    approved_products = FarmerProduct.query.filter_by(
-        farmer_id=farmer_id,
-        is_active=True,
-        is_approved=True
-    ).count()
-
-    pending_products = FarmerProduct.query.filter_by(
-        farmer_id=farmer_id,
-        is_active=True,
-        is_approved=False
-    ).count()
-
-    out_of_stock = FarmerProduct.query.filter_by(
-        farmer_id=farmer_id,
-        is_active=True,
-        is_out_of_stock=True
-    ).count()
-
-    # Order statistics
-    total_orders = OrderItem.query.filter_by(farmer_id=farmer_id).count()
+    if series and not 1 <= days <= SERIES_MAX_DAYS:
+        return jsonify({'message': f'days must be between 1 and {SERIES_MAX_DAYS}'}), 400
 
-    approved_order_items = OrderItem.query.join(Order).filter(
-        OrderItem.farmer_id == farmer_id,
-        Order.status == 'approved'
-    ).all()
-
-    total_revenue = sum(float(item.subtotal) for item in approved_order_items)
-    total_items_sold = sum(item.quantity for item in approved_order_items)
-
-    # Product views
-    products = FarmerProduct.query.filter_by(farmer_id=farmer_id, is_active=True).all()
-    total_views = sum(product.view_count for product in products)
+    analytics = compute_farmer_analytics(farmer_id)
 
-    return jsonify({
-        'products': {
-            'total': total_products,
-            'approved': approved_products,
-            'pending': pending_products,
-            'out_of_stock': out_of_stock
-        },
-        'orders': {
-            'total': total_orders,
-            'total_revenue': total_revenue,
-            'total_items_sold': total_items_sold
-        },
-        'engagement': {
-            'total_views': total_views
+    if series:
+        analytics['series'] = {
+            'period': series,
+            'days': days,
+            'points': compute_farmer_sales_series(farmer_id, series, days)
         }
-    }), 200
+
+    return jsonify(analytics), 200
@@ -1,26 +1,37 @@
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, Response, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
 from app.models.message import Message
+from app.models.conversation import Conversation
+from app.models.unread_counter import UnreadCounter
 from app.models.activity_log import ActivityLog
 from app.utils.helpers import get_client_ip
+from app.utils.decorators import admin_required
+from app.utils.auth import get_user_status, load_current_identity
+from app.utils.pagination import keyset_paginate, InvalidCursor
+from app.utils.notifications import event_stream, issue_stream_ticket, notify_user, read_stream_ticket
 from sqlalchemy import or_, and_
 
+logger = logging.getLogger(__name__)
+
 messages_bp = Blueprint('messages', __name__)
 
+# Largest value of the integer messages.id column
+MAX_MESSAGE_ID = 2 ** 31 - 1
+
+
+def push_unread_count(user_id):
+    """Push a user's new unread total to their connected clients"""
+    notify_user(user_id, 'unread_count', unread_count=UnreadCounter.get_count(user_id))
+
+
 @messages_bp.route('/users/buyers', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_buyers():
     """Get list of all buyers (for admin to message)"""
     from app.models.buyer_profile import BuyerProfile
-    from app.utils.decorators import admin_required
-
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if user.role != 'admin':
-        return jsonify({'message': 'Admin access required'}), 403
 
     buyers = BuyerProfile.query.join(User).filter(User.is_active == True).all()
 
@@ -36,17 +47,11 @@ def get_buyers():
 
 
 @messages_bp.route('/users/farmers', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_farmers():
     """Get list of all farmers (for admin to message)"""
     from app.models.farmer_profile import FarmerProfile
 
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if user.role != 'admin':
-        return jsonify({'message': 'Admin access required'}), 403
-
     farmers = FarmerProfile.query.join(User).filter(User.is_active == True).all()
 
     return jsonify({
@@ -64,9 +69,12 @@ def get_farmers():
 def send_message():
     """Send a message to another user"""
     sender_id = int(get_jwt_identity())
-    sender = User.query.get(sender_id)
+    sender = load_current_identity()  # role from token claims, no user query
     data = request.get_json()
 
+    if not sender:
+        return jsonify({'message': 'User not found'}), 404
+
     if not data.get('receiver_id') or not data.get('message'):
         return jsonify({'message': 'Receiver ID and message are required'}), 400
 
@@ -78,7 +86,7 @@ def send_message():
 
     # Verify sender has permission to message this receiver
     # Admin can message anyone, buyers/farmers can only message admin
-    if sender.role != 'admin' and receiver.role != 'admin':
+    if sender['role'] != 'admin' and receiver.role != 'admin':
         return jsonify({'message': 'You can only send messages to admin'}), 403
 
     try:
@@ -95,6 +103,10 @@ def send_message():
             parent_message_id=data.get('parent_message_id')
         )
         db.session.add(message)
+        db.session.flush()
+
+        # Update both participants' conversation summaries
+        Conversation.record_message(message)
 
         # Log activity
         ActivityLog.log_activity(
@@ -109,14 +121,18 @@ def send_message():
 
         db.session.commit()
 
+        message_data = message.to_dict()
+        notify_user(receiver_id, 'message', message=message_data,
+                    unread_count=UnreadCounter.get_count(receiver_id))
+
         return jsonify({
             'message': 'Message sent successfully',
-            'data': message.to_dict()
+            'data': message_data
         }), 201
 
     except Exception as e:
         db.session.rollback()
-        print(f"[MESSAGE ERROR] Failed to send message: {str(e)}")
+        logger.exception('Failed to send message', extra={'user_id': sender_id})
         return jsonify({'message': 'Error sending message', 'error': str(e)}), 500
 
 
@@ -128,6 +144,7 @@ def get_inbox():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     unread_only = request.args.get('unread_only', 'false').lower() == 'true'
+    reply_limit = request.args.get('reply_limit', current_app.config['MESSAGE_REPLY_LIMIT'], type=int)
 
     query = Message.query.filter_by(receiver_id=user_id)
 
@@ -137,16 +154,31 @@ def get_inbox():
     # Only get top-level messages (not replies)
     query = query.filter_by(parent_message_id=None)
 
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        try:
+            keyset = keyset_paginate(query, [Message.created_at, Message.id], cursor, per_page,
+                                     with_total=include_total)
+        except InvalidCursor:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'messages': Message.to_dict_many(keyset.items, include_thread=True, reply_limit=reply_limit),
+            **keyset.meta(),
+            'unread_count': UnreadCounter.get_count(user_id)
+        }), 200
+
     pagination = query.order_by(Message.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
 
     return jsonify({
-        'messages': [msg.to_dict(include_thread=True) for msg in pagination.items],
+        'messages': Message.to_dict_many(pagination.items, include_thread=True, reply_limit=reply_limit),
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page,
-        'unread_count': Message.query.filter_by(receiver_id=user_id, is_read=False).count()
+        'unread_count': UnreadCounter.get_count(user_id)
     }), 200
 
 
@@ -157,6 +189,7 @@ def get_sent():
     user_id = int(get_jwt_identity())
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    reply_limit = request.args.get('reply_limit', current_app.config['MESSAGE_REPLY_LIMIT'], type=int)
 
     # Only get top-level messages (not replies)
     query = Message.query.filter_by(sender_id=user_id, parent_message_id=None)
@@ -166,7 +199,7 @@ def get_sent():
     )
 
     return jsonify({
-        'messages': [msg.to_dict(include_thread=True) for msg in pagination.items],
+        'messages': Message.to_dict_many(pagination.items, include_thread=True, reply_limit=reply_limit),
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page
@@ -176,45 +209,28 @@ def get_sent():
 @messages_bp.route('/conversations', methods=['GET'])
 @jwt_required()
 def get_conversations():
-    """Get all unique conversations (threads) for the current user"""
+    """
+    Get all unique conversations (threads) for the current user
+    Most recently active first; pass ?cursor= from next_cursor for the next page
+    """
     user_id = int(get_jwt_identity())
+    per_page = request.args.get('per_page', 50, type=int)
+    cursor = request.args.get('cursor')
 
-    # Get all messages where user is sender or receiver
-    messages = Message.query.filter(
-        or_(
-            Message.sender_id == user_id,
-            Message.receiver_id == user_id
-        )
-    ).order_by(Message.created_at.desc()).all()
-
-    # Group by thread_id and get the latest message for each thread
-    threads = {}
-    for msg in messages:
-        if msg.thread_id not in threads:
-            # Get the other user in the conversation
-            other_user_id = msg.receiver_id if msg.sender_id == user_id else msg.sender_id
-            other_user = User.query.get(other_user_id)
-
-            # Count unread messages in this thread
-            unread_count = Message.query.filter_by(
-                thread_id=msg.thread_id,
-                receiver_id=user_id,
-                is_read=False
-            ).count()
-
-            threads[msg.thread_id] = {
-                'thread_id': msg.thread_id,
-                'other_user_id': other_user_id,
-                'other_user_name': other_user.buyer_profile.full_name if other_user.role == 'buyer' and other_user.buyer_profile
-                                  else other_user.farmer_profile.full_name if other_user.role == 'farmer' and other_user.farmer_profile
-                                  else 'Admin',
-                'other_user_role': other_user.role,
-                'last_message': msg.to_dict(),
-                'unread_count': unread_count
-            }
+    query = Conversation.query.filter_by(user_id=user_id).options(
+        db.joinedload(Conversation.other_user).joinedload(User.buyer_profile),
+        db.joinedload(Conversation.other_user).joinedload(User.farmer_profile),
+        db.joinedload(Conversation.last_message)
+    )
+
+    try:
+        keyset = keyset_paginate(query, [Conversation.last_activity_at, Conversation.id], cursor, per_page)
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
 
     return jsonify({
-        'conversations': list(threads.values())
+        'conversations': [conversation.to_dict() for conversation in keyset.items],
+        **keyset.meta()
     }), 200
 
 
@@ -238,13 +254,51 @@ def get_thread(thread_id):
     if not messages:
         return jsonify({'message': 'Thread not found or access denied'}), 404
 
-    # Mark all received messages in this thread as read
-    for msg in messages:
-        if msg.receiver_id == user_id and not msg.is_read:
-            msg.mark_as_read()
+    # Mark every received message up to the newest one shown as read in one UPDATE
+    marked = Message.mark_thread_read(thread_id, user_id, up_to_message_id=max(msg.id for msg in messages))
+    messages_data = [msg.to_dict() for msg in messages]
+
+    if marked:
+        db.session.commit()
+        push_unread_count(user_id)
+
+    return jsonify({
+        'messages': messages_data
+    }), 200
+
+
+@messages_bp.route('/thread/<thread_id>/read', methods=['POST'])
+@jwt_required()
+def mark_thread_read(thread_id):
+    """
+    Mark received messages in a thread as read
+    Optional JSON body: {"up_to_message_id": <id>} as a high-water mark
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    up_to_message_id = data.get('up_to_message_id')
+
+    # bool is an int subclass (true must not mean message 1); ids fit a 32-bit column
+    if up_to_message_id is not None and (
+        not isinstance(up_to_message_id, int) or isinstance(up_to_message_id, bool)
+        or not 0 <= up_to_message_id <= MAX_MESSAGE_ID
+    ):
+        return jsonify({'message': 'up_to_message_id must be a message id'}), 400
+
+    conversation = Conversation.query.filter_by(thread_id=thread_id, user_id=user_id).first()
+    if not conversation:
+        return jsonify({'message': 'Thread not found or access denied'}), 404
+
+    marked = Message.mark_thread_read(thread_id, user_id, up_to_message_id=up_to_message_id)
+
+    db.session.commit()
+    if marked:
+        push_unread_count(user_id)
 
     return jsonify({
-        'messages': [msg.to_dict() for msg in messages]
+        'message': 'Thread marked as read',
+        'marked_read': marked,
+        'unread_count': conversation.unread_count
     }), 200
 
 
@@ -259,11 +313,15 @@ def get_message(message_id):
     if message.sender_id != user_id and message.receiver_id != user_id:
         return jsonify({'message': 'Access denied'}), 403
 
-    # Mark as read if user is receiver
-    if message.receiver_id == user_id:
-        message.mark_as_read()
+    # Mark as read if user is receiver; only writes when it was unread
+    marked = message.receiver_id == user_id and message.mark_as_read()
+    message_data = message.to_dict(include_thread=True)
+
+    if marked:
+        db.session.commit()
+        push_unread_count(user_id)
 
-    return jsonify({'message': message.to_dict(include_thread=True)}), 200
+    return jsonify({'message': message_data}), 200
 
 
 @messages_bp.route('/<int:message_id>/read', methods=['PATCH'])
@@ -277,7 +335,9 @@ def mark_as_read(message_id):
     if message.receiver_id != user_id:
         return jsonify({'message': 'Access denied'}), 403
 
-    message.mark_as_read()
+    if message.mark_as_read():
+        db.session.commit()
+        push_unread_count(user_id)
 
     return jsonify({'message': 'Message marked as read'}), 200
 
@@ -288,12 +348,56 @@ def get_unread_count():
     """Get count of unread messages"""
     user_id = int(get_jwt_identity())
 
-    unread_count = Message.query.filter_by(
-        receiver_id=user_id,
-        is_read=False
-    ).count()
+    return jsonify({'unread_count': UnreadCounter.get_count(user_id)}), 200
+
+
+@messages_bp.route('/stream-ticket', methods=['POST'])
+@jwt_required()
+def create_stream_ticket():
+    """Short-lived ticket for opening the notification stream (EventSource cannot send headers)"""
+    user_id = int(get_jwt_identity())
+
+    return jsonify({
+        'ticket': issue_stream_ticket(user_id),
+        'expires_in': current_app.config.get('NOTIFY_STREAM_TICKET_TTL', 60)
+    }), 200
+
 
-    return jsonify({'unread_count': unread_count}), 200
+@messages_bp.route('/stream', methods=['GET'])
+def stream_notifications():
+    """
+    Server-Sent Events stream of the current user's message notifications
+    Sends an unread_count event on connect, then unread_count and message
+    events as they happen, and a reconnect event before the stream ends
+    after NOTIFY_STREAM_MAX_AGE seconds. Clients pass a ticket from
+    POST /stream-ticket as ?ticket=, never the access token.
+    """
+    user_id = read_stream_ticket(request.args.get('ticket', ''))
+    if user_id is None:
+        return jsonify({'message': 'Missing, invalid or expired stream ticket'}), 401
+
+    status = get_user_status(user_id)
+    if not status or not status['is_active']:
+        return jsonify({'message': 'Account is deactivated'}), 403
+
+    def initial_events():
+        return [{'type': 'unread_count', 'unread_count': UnreadCounter.get_count(user_id)}]
+
+    # Give the connection back to the pool before the long-lived stream starts
+    db.session.remove()
+
+    stream = event_stream(
+        current_app._get_current_object(),
+        current_app.extensions['notify_broker'],
+        user_id,
+        initial_events,
+        current_app.config.get('NOTIFY_KEEPALIVE_INTERVAL', 15.0),
+        current_app.config.get('NOTIFY_STREAM_MAX_AGE')
+    )
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 @messages_bp.route('/<int:message_id>', methods=['DELETE'])
@@ -305,13 +409,23 @@ def delete_message(message_id):
 
     # Only sender or admin can delete
     if message.sender_id != user_id:
-        user = User.query.get(user_id)
-        if user.role != 'admin':
+        claims = load_current_identity()
+        if not claims or claims['role'] != 'admin':
             return jsonify({'message': 'Access denied'}), 403
 
     try:
+        thread_id = message.thread_id
+        receiver_id = message.receiver_id
+        was_unread = not message.is_read
         db.session.delete(message)
+        db.session.flush()
+
+        # Last message / unread count of the thread may have changed
+        Conversation.refresh_thread(thread_id)
+
         db.session.commit()
+        if was_unread:
+            push_unread_count(receiver_id)
         return jsonify({'message': 'Message deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
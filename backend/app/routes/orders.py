@@ -1,94 +1,95 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity
+import logging
+from flask import Blueprint, g, request, jsonify
 from app import db
-from app.models.user import User
+from app.models.buyer_profile import BuyerProfile
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.farmer_product import FarmerProduct
 from app.models.activity_log import ActivityLog
 from app.utils.decorators import buyer_required
 from app.utils.helpers import get_client_ip
-from datetime import datetime
+from app.utils.idempotency import idempotent
+from sqlalchemy import insert
+
+logger = logging.getLogger(__name__)
 
 orders_bp = Blueprint('orders', __name__)
 
 @orders_bp.route('/confirm', methods=['POST'])
 @buyer_required
+@idempotent
 def confirm_order():
     """
     Buyer confirms cart and creates pending order
     Order is sent to admin for approval
+    Retries carrying the same Idempotency-Key get the original response
     """
-    user_id = int(get_jwt_identity())  # Convert string to int
-    user = User.query.get(user_id)
+    user_id = g.user_id
     data = request.get_json() or {}
 
-    if not user.buyer_profile or not user.buyer_profile.cart:
+    buyer = BuyerProfile.query.get(g.buyer_profile_id) if g.buyer_profile_id else None
+    cart = Cart.query.filter_by(buyer_id=buyer.id).first() if buyer else None
+    if not cart:
         return jsonify({'message': 'Cart not found'}), 404
 
-    cart = user.buyer_profile.cart
-    cart_items = cart.items.all()
-
-    if not cart_items:
+    # Every cart line with the product columns checkout needs, in one query
+    lines = db.session.query(
+        CartItem.product_id,
+        CartItem.quantity,
+        FarmerProduct.farmer_id,
+        FarmerProduct.name,
+        FarmerProduct.price,
+        FarmerProduct.unit,
+        FarmerProduct.quantity.label('stock'),
+        FarmerProduct.is_approved,
+        FarmerProduct.is_active
+    ).join(FarmerProduct, FarmerProduct.id == CartItem.product_id).filter(
+        CartItem.cart_id == cart.id
+    ).order_by(CartItem.id).all()
+
+    if not lines:
         return jsonify({'message': 'Cart is empty'}), 400
 
-    try:
-        # Calculate total
-        total_amount = sum(
-            item.quantity * float(item.product.price)
-            for item in cart_items
-            if item.product
-        )
+    # Verify every product is still available
+    for line in lines:
+        if not line.is_approved or not line.is_active:
+            return jsonify({'message': f'Product {line.name} is no longer available'}), 400
 
-        # Generate temporary order number (will be updated after flush)
-        temp_order_number = f'ORD-{datetime.utcnow().strftime("%Y%m%d%H%M%S")}-TEMP'
+        if line.stock < line.quantity:
+            return jsonify({'message': f'Insufficient stock for {line.name}'}), 400
 
-        # Create order
+    try:
         order = Order(
-            buyer_id=user.buyer_profile.id,
-            order_number=temp_order_number,
+            buyer_id=buyer.id,
+            order_number=Order.generate_order_number(),
             status='pending',
-            total_amount=total_amount,
-            delivery_address=data.get('delivery_address') or user.buyer_profile.delivery_address,
-            delivery_city=data.get('delivery_city') or user.buyer_profile.city,
-            delivery_state=data.get('delivery_state') or user.buyer_profile.state,
-            delivery_zip=data.get('delivery_zip') or user.buyer_profile.zip_code,
-            delivery_phone=data.get('delivery_phone') or user.buyer_profile.phone,
+            total_amount=sum(line.quantity * line.price for line in lines),
+            delivery_address=data.get('delivery_address') or buyer.delivery_address,
+            delivery_city=data.get('delivery_city') or buyer.city,
+            delivery_state=data.get('delivery_state') or buyer.state,
+            delivery_zip=data.get('delivery_zip') or buyer.zip_code,
+            delivery_phone=data.get('delivery_phone') or buyer.phone,
             buyer_notes=data.get('buyer_notes')
         )
         db.session.add(order)
         db.session.flush()  # Get order.id
 
-        # Generate final order number with actual ID
-        order.order_number = order.generate_order_number()
-
-        # Create order items from cart items
-        for cart_item in cart_items:
-            if not cart_item.product:
-                continue
-
-            # Verify product is still available
-            if not cart_item.product.is_approved or not cart_item.product.is_active:
-                return jsonify({
-                    'message': f'Product {cart_item.product.name} is no longer available'
-                }), 400
-
-            if cart_item.product.quantity < cart_item.quantity:
-                return jsonify({
-                    'message': f'Insufficient stock for {cart_item.product.name}'
-                }), 400
-
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                farmer_id=cart_item.product.farmer_id,
-                product_name=cart_item.product.name,
-                product_price=cart_item.product.price,
-                quantity=cart_item.quantity,
-                unit=cart_item.product.unit,
-                subtotal=cart_item.quantity * cart_item.product.price
-            )
-            db.session.add(order_item)
+        # Create all order items with one executemany INSERT
+        db.session.execute(insert(OrderItem), [
+            {
+                'order_id': order.id,
+                'product_id': line.product_id,
+                'farmer_id': line.farmer_id,
+                'product_name': line.name,
+                'product_price': line.price,
+                'quantity': line.quantity,
+                'unit': line.unit,
+                'subtotal': line.quantity * line.price
+            }
+            for line in lines
+        ])
 
         # Clear cart after order creation
         cart.clear()
@@ -113,7 +114,5 @@ def confirm_order():
 
     except Exception as e:
         db.session.rollback()
-        print(f"[ORDER ERROR] Failed to create order: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Failed to create order', extra={'user_id': user_id})
         return jsonify({'message': 'Error creating order', 'error': str(e)}), 500
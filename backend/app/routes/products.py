@@ -1,21 +1,29 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.farmer_product import FarmerProduct
 from app.models.category import Category
 from app.models.activity_log import ActivityLog
 from app.utils.helpers import get_client_ip
+from app.utils.search import apply_product_search
+from app.utils.pagination import keyset_paginate, InvalidCursor
+from app.utils.db_routing import use_replica
+from app.utils.cache import cached_response, CATALOG_CACHE
 
 products_bp = Blueprint('products', __name__)
 
 @products_bp.route('/', methods=['GET'])
+@use_replica
 def get_public_products():
     """
     Get all approved and active products (public endpoint)
     Supports filtering and search
+    Pass ?cursor= (empty for the first page) for keyset pagination
     """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
     category_id = request.args.get('category_id', type=int)
     product_type = request.args.get('product_type')
     city = request.args.get('city')
@@ -23,7 +31,7 @@ def get_public_products():
     search = request.args.get('search', '')
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
-    sort_by = request.args.get('sort_by', 'created_at')  # 'created_at', 'price_asc', 'price_desc', 'views'
+    sort_by = request.args.get('sort_by', 'created_at')  # 'created_at', 'price_asc', 'price_desc', 'views', 'relevance'
 
     # Base query: only approved and active products
     query = FarmerProduct.query.filter_by(
@@ -44,13 +52,9 @@ def get_public_products():
     if state:
         query = query.filter(FarmerProduct.state.ilike(f'%{state}%'))
 
+    relevance = None
     if search:
-        query = query.filter(
-            db.or_(
-                FarmerProduct.name.ilike(f'%{search}%'),
-                FarmerProduct.description.ilike(f'%{search}%')
-            )
-        )
+        query, relevance = apply_product_search(query, search)
 
     if min_price is not None:
         query = query.filter(FarmerProduct.price >= min_price)
@@ -65,13 +69,40 @@ def get_public_products():
         query = query.order_by(FarmerProduct.price.desc())
     elif sort_by == 'views':
         query = query.order_by(FarmerProduct.view_count.desc())
+    elif sort_by == 'relevance' and relevance is not None:
+        query = query.order_by(relevance, FarmerProduct.created_at.desc())
     else:  # default to created_at
         query = query.order_by(FarmerProduct.created_at.desc())
 
+    query = query.options(*FarmerProduct.listing_options(include_farmer=True))
+
+    if cursor is not None:
+        # Keyset pagination on the active sort column with id as tie-breaker
+        if sort_by == 'price_asc':
+            columns, descending = [FarmerProduct.price, FarmerProduct.id], False
+        elif sort_by == 'price_desc':
+            columns, descending = [FarmerProduct.price, FarmerProduct.id], True
+        elif sort_by == 'views':
+            columns, descending = [FarmerProduct.view_count, FarmerProduct.id], True
+        elif sort_by == 'relevance' and relevance is not None:
+            return jsonify({'message': 'Cursor pagination is not supported for relevance sorting'}), 400
+        else:
+            columns, descending = [FarmerProduct.created_at, FarmerProduct.id], True
+
+        try:
+            keyset = keyset_paginate(query, columns, cursor, per_page, descending, with_total=include_total)
+        except InvalidCursor:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'products': FarmerProduct.to_dict_many(keyset.items, include_farmer=True),
+            **keyset.meta()
+        }), 200
+
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
     return jsonify({
-        'products': [product.to_dict(include_farmer=True) for product in pagination.items],
+        'products': FarmerProduct.to_dict_many(pagination.items, include_farmer=True),
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page
@@ -79,6 +110,7 @@ def get_public_products():
 
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@use_replica
 def get_product(product_id):
     """Get single product by ID and increment view count"""
     product = FarmerProduct.query.filter_by(
@@ -87,24 +119,29 @@ def get_product(product_id):
         is_active=True
     ).first_or_404()
 
-    # Increment view count
-    product.view_count += 1
-    db.session.commit()
+    # Count the view in memory; increments are flushed to the database in batches
+    view_counter = current_app.extensions['view_counter']
+    view_counter.increment(product.id)
+
+    data = product.to_dict(include_farmer=True)
+    data['view_count'] += view_counter.pending(product.id)
 
-    return jsonify({'product': product.to_dict(include_farmer=True)}), 200
+    return jsonify({'product': data}), 200
 
 
 @products_bp.route('/categories', methods=['GET'])
+@cached_response(CATALOG_CACHE)
 def get_active_categories():
     """Get all active categories (public endpoint)"""
     categories = Category.query.filter_by(is_active=True).order_by(Category.name).all()
 
     return jsonify({
-        'categories': [cat.to_dict() for cat in categories]
+        'categories': Category.to_dict_many(categories)
     }), 200
 
 
 @products_bp.route('/featured', methods=['GET'])
+@cached_response(CATALOG_CACHE)
 def get_featured_products():
     """Get featured products (most viewed)"""
     limit = request.args.get('limit', 10, type=int)
@@ -113,14 +150,17 @@ def get_featured_products():
         is_approved=True,
         is_active=True,
         is_out_of_stock=False
+    ).options(
+        *FarmerProduct.listing_options(include_farmer=True)
     ).order_by(FarmerProduct.view_count.desc()).limit(limit).all()
 
     return jsonify({
-        'products': [product.to_dict(include_farmer=True) for product in products]
+        'products': FarmerProduct.to_dict_many(products, include_farmer=True)
     }), 200
 
 
 @products_bp.route('/latest', methods=['GET'])
+@cached_response(CATALOG_CACHE)
 def get_latest_products():
     """Get latest products"""
     limit = request.args.get('limit', 10, type=int)
@@ -129,14 +169,17 @@ def get_latest_products():
         is_approved=True,
         is_active=True,
         is_out_of_stock=False
+    ).options(
+        *FarmerProduct.listing_options(include_farmer=True)
     ).order_by(FarmerProduct.created_at.desc()).limit(limit).all()
 
     return jsonify({
-        'products': [product.to_dict(include_farmer=True) for product in products]
+        'products': FarmerProduct.to_dict_many(products, include_farmer=True)
     }), 200
 
 
 @products_bp.route('/search-filters', methods=['GET'])
+@cached_response(CATALOG_CACHE)
 def get_search_filters():
     """Get available filter options for search"""
     # Get distinct product types
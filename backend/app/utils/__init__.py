@@ -1,5 +1,7 @@
 from app.utils.decorators import role_required, admin_required, farmer_required, buyer_required
 from app.utils.helpers import get_client_ip, allowed_file, generate_unique_filename
+from app.utils.search import apply_product_search, rebuild_search_index
+from app.utils.query_counter import count_queries, assert_max_queries
 
 __all__ = [
     'role_required',
@@ -8,5 +10,9 @@ __all__ = [
     'buyer_required',
     'get_client_ip',
     'allowed_file',
-    'generate_unique_filename'
+    'generate_unique_filename',
+    'apply_product_search',
+    'rebuild_search_index',
+    'count_queries',
+    'assert_max_queries'
 ]
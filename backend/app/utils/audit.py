@@ -0,0 +1,185 @@
+import atexit
+import logging
+import queue
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding audit entries written during the current transaction
+PENDING_AUDIT_KEY = 'pending_audit_entries'
+
+
+class SessionAuditSink:
+    """
+    Adds audit rows to the caller's own transaction
+    Synchronous and deterministic, so tests can assert on logs right after a request
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def write(self, entry):
+        from app.models.activity_log import ActivityLog
+        log = ActivityLog(**entry)
+        db.session.add(log)
+        return log
+
+    def write_many(self, entries):
+        """Add many audit rows with one executemany INSERT"""
+        from app.models.activity_log import ActivityLog
+        if entries:
+            db.session.execute(ActivityLog.__table__.insert(), entries)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {'sink': 'session'}
+
+
+class BufferedAuditSink:
+    """
+    Bulk-inserts audit rows from a background thread
+    Entries are held on the session until the request transaction commits (and
+    discarded on rollback), then pushed to a bounded in-process queue. When the
+    queue is full new entries are dropped and counted rather than blocking the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', 500)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', 1.0)
+        self.shutdown_timeout = app.config.get('AUDIT_SHUTDOWN_TIMEOUT', 10.0)
+        self._queue = queue.Queue(maxsize=app.config.get('AUDIT_QUEUE_SIZE', 10000))
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._worker = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        atexit.register(self.close)
+
+    def write(self, entry):
+        db.session.info.setdefault(PENDING_AUDIT_KEY, []).append(entry)
+
+    def write_many(self, entries):
+        db.session.info.setdefault(PENDING_AUDIT_KEY, []).extend(entries)
+
+    def enqueue(self, entries):
+        """Queue committed entries for the background writer"""
+        self._ensure_worker()
+        for entry in entries:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+
+    def _ensure_worker(self):
+        # Started lazily so forked workers get their own thread
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stopping.clear()
+                self._worker = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._insert(batch)
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, batch):
+        from app.models.activity_log import ActivityLog
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(ActivityLog.__table__.insert(), batch)
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+        except Exception:
+            with self._lock:
+                self.failed += len(batch)
+            logger.exception('Failed to write %d audit log entries', len(batch))
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued entry has been written"""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Drain the queue and stop the writer (registered with atexit)"""
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(self.shutdown_timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sink': 'buffered',
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'batches': self.batches
+            }
+
+
+AUDIT_SINKS = {
+    'session': SessionAuditSink,
+    'buffered': BufferedAuditSink
+}
+
+
+def init_audit(app):
+    """Create the audit sink configured by AUDIT_SINK (a name or a factory taking the app)"""
+    setting = app.config.get('AUDIT_SINK', 'session')
+    factory = AUDIT_SINKS[setting] if isinstance(setting, str) else setting
+    app.extensions['audit_sink'] = factory(app)
+    return app.extensions['audit_sink']
+
+
+def get_audit_sink():
+    """Audit sink of the current app, or None outside an initialized app"""
+    return current_app.extensions.get('audit_sink') if has_app_context() else None
+
+
+@event.listens_for(db.session, 'after_commit')
+def _enqueue_committed_entries(session):
+    entries = session.info.pop(PENDING_AUDIT_KEY, None)
+    if entries:
+        sink = get_audit_sink()
+        if sink is not None and hasattr(sink, 'enqueue'):
+            sink.enqueue(entries)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_rolled_back_entries(session, previous_transaction):
+    session.info.pop(PENDING_AUDIT_KEY, None)
@@ -0,0 +1,140 @@
+import threading
+import time
+from flask import current_app, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from app import db
+
+
+def user_claims(user):
+    """JWT claims letting requests authorize without loading the user"""
+    return {
+        'role': user.role,
+        'is_active': user.is_active,
+        'farmer_profile_id': user.farmer_profile.id if user.farmer_profile else None,
+        'buyer_profile_id': user.buyer_profile.id if user.buyer_profile else None
+    }
+
+
+class UserStatusCache:
+    """
+    Short-lived per-process cache of user claims keyed by user id
+    Bounds how long a deactivated account keeps working to the TTL, while
+    most authenticated requests do no query at all. Entries are dropped
+    when an admin changes the account's status.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is None:
+                return None
+
+            claims, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return claims
+
+    def set(self, user_id, claims):
+        with self._lock:
+            self._entries[user_id] = (claims, time.monotonic() + self.ttl)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+def init_auth(app):
+    app.extensions['user_status_cache'] = UserStatusCache(app.config.get('AUTH_STATUS_CACHE_TTL', 30))
+    return app.extensions['user_status_cache']
+
+
+def _load_claims(user_id):
+    """Current claims of a user from the database, or None if the user is gone"""
+    from app.models.user import User
+    from app.models.farmer_profile import FarmerProfile
+    from app.models.buyer_profile import BuyerProfile
+
+    # Always the primary: a lagging replica could re-cache a revoked account as active
+    row = db.session.execute(
+        db.select(User.role, User.is_active, FarmerProfile.id, BuyerProfile.id)
+        .outerjoin(FarmerProfile, FarmerProfile.user_id == User.id)
+        .outerjoin(BuyerProfile, BuyerProfile.user_id == User.id)
+        .where(User.id == user_id),
+        bind_arguments={'bind': db.engine}
+    ).first()
+
+    if row is None:
+        return None
+
+    role, is_active, farmer_profile_id, buyer_profile_id = row
+    return {
+        'role': role,
+        'is_active': is_active,
+        'farmer_profile_id': farmer_profile_id,
+        'buyer_profile_id': buyer_profile_id
+    }
+
+
+def get_user_status(user_id):
+    """Claims of a user, served from the status cache when fresh"""
+    cache = current_app.extensions['user_status_cache']
+    claims = cache.get(user_id)
+    if claims is None:
+        claims = _load_claims(user_id)
+        if claims is not None:
+            cache.set(user_id, claims)
+    return claims
+
+
+def cache_user_status(user):
+    """Prime the status cache with a user already loaded (e.g. at login)"""
+    current_app.extensions['user_status_cache'].set(user.id, user_claims(user))
+
+
+def invalidate_user_status(user_id):
+    """Forget a user's cached status so the next request re-reads it"""
+    current_app.extensions['user_status_cache'].invalidate(user_id)
+
+
+def load_current_identity():
+    """
+    Resolve the verified JWT's user onto flask.g
+    Sets g.user_id, g.user_role, g.farmer_profile_id and g.buyer_profile_id
+    and returns the claims, or None if the user no longer exists. The active
+    flag always comes from the status cache; the rest comes from the token,
+    falling back to the cache for tokens issued without claims.
+    """
+    user_id = int(get_jwt_identity())
+    status = get_user_status(user_id)
+    if status is None:
+        return None
+
+    token = get_jwt()
+    claims = {
+        'role': token.get('role', status['role']),
+        'is_active': status['is_active'],
+        'farmer_profile_id': token.get('farmer_profile_id', status['farmer_profile_id']),
+        'buyer_profile_id': token.get('buyer_profile_id', status['buyer_profile_id'])
+    }
+
+    g.user_id = user_id
+    g.user_role = claims['role']
+    g.farmer_profile_id = claims['farmer_profile_id']
+    g.buyer_profile_id = claims['buyer_profile_id']
+    return claims
+
+
+def current_user():
+    """The authenticated User, loaded at most once per request"""
+    from app.models.user import User
+
+    if 'user' not in g:
+        user_id = g.user_id if 'user_id' in g else int(get_jwt_identity())
+        g.user = db.session.get(User, user_id)
+    return g.user
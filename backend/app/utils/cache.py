@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import current_app, make_response, request
+
+# Namespace shared by the public catalog endpoints; invalidated on product/category writes
+CATALOG_CACHE = 'catalog'
+
+
+class MemoryCacheBackend:
+    """In-process cache with per-entry TTL and LRU eviction"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = defaultdict(int)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_version(self, namespace):
+        with self._lock:
+            return self._versions[namespace]
+
+    def bump_version(self, namespace):
+        with self._lock:
+            self._versions[namespace] += 1
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Cache stored in any Redis-protocol server (Redis, Valkey, KeyDB...)
+    Shared by all workers, so an invalidation in one process is seen by every other
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url, key_prefix='agrilink:cache:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+        self.evictions = 0  # eviction is handled by the server's maxmemory policy
+
+    def get(self, key):
+        raw = self.client.get(self.key_prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.key_prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def get_version(self, namespace):
+        return int(self.client.get(f'{self.key_prefix}version:{namespace}') or 0)
+
+    def bump_version(self, namespace):
+        self.client.incr(f'{self.key_prefix}version:{namespace}')
+
+    def size(self):
+        return None
+
+
+class NullCacheBackend:
+    """Caches nothing; used to disable response caching"""
+
+    evictions = 0
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def get_version(self, namespace):
+        return 0
+
+    def bump_version(self, namespace):
+        pass
+
+    def size(self):
+        return 0
+
+
+class ResponseCache:
+    """
+    Caches successful GET responses by namespace and full request path
+    Entries are keyed by a per-namespace version, so invalidating a namespace
+    is a single version bump no matter how many entries it holds.
+    """
+
+    def __init__(self, backend, default_ttl=60):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _key(self, namespace):
+        version = self.backend.get_version(namespace)
+        args = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+        return f'{namespace}:{version}:{request.path}?{args}'
+
+    def _count(self, counter, namespace):
+        with self._lock:
+            counter[namespace] += 1
+
+    def cached(self, namespace, ttl, fn, *args, **kwargs):
+        key = self._key(namespace)
+        entry = self.backend.get(key)
+
+        if entry is not None:
+            self._count(self.hits, namespace)
+            response = current_app.response_class(entry['body'], status=200, mimetype=entry['mimetype'])
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        self._count(self.misses, namespace)
+        response = make_response(fn(*args, **kwargs))
+        if response.status_code == 200:
+            self.backend.set(key, {
+                'body': response.get_data(as_text=True),
+                'mimetype': response.mimetype
+            }, ttl or self.default_ttl)
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    def invalidate(self, namespace):
+        self.backend.bump_version(namespace)
+
+    def stats(self):
+        with self._lock:
+            namespaces = set(self.hits) | set(self.misses)
+            return {
+                'backend': type(self.backend).__name__,
+                'entries': self.backend.size(),
+                'evictions': self.backend.evictions,
+                'namespaces': {
+                    namespace: {'hits': self.hits[namespace], 'misses': self.misses[namespace]}
+                    for namespace in sorted(namespaces)
+                }
+            }
+
+
+def init_cache(app):
+    """Create the response cache configured by CACHE_BACKEND ('memory', 'redis' or 'null')"""
+    backend_name = app.config.get('CACHE_BACKEND', 'memory')
+
+    if backend_name == 'redis':
+        backend = RedisCacheBackend(app.config['CACHE_REDIS_URL'])
+    elif backend_name == 'null':
+        backend = NullCacheBackend()
+    else:
+        backend = MemoryCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+
+    app.extensions['response_cache'] = ResponseCache(backend, app.config.get('CACHE_DEFAULT_TTL', 60))
+    return app.extensions['response_cache']
+
+
+def cached_response(namespace, ttl=None):
+    """
+    Decorator caching a public GET endpoint's 200 responses
+    Usage: @cached_response(CATALOG_CACHE, ttl=300)
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None or request.method != 'GET':
+                return fn(*args, **kwargs)
+            return cache.cached(namespace, ttl, fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def invalidate_cache(namespace):
+    """Drop every cached response in a namespace"""
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        cache.invalidate(namespace)
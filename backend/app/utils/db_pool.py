@@ -0,0 +1,118 @@
+from flask import jsonify
+from sqlalchemy.engine import make_url
+
+REPLICA_BIND = 'replica'
+
+
+def build_engine_options(config, url):
+    """
+    SQLAlchemy engine options for a database URL from the DB_* settings
+    Queue-pool sizing only applies to server databases; SQLite keeps
+    Flask-SQLAlchemy's own pool choice.
+    """
+    options = {
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800)
+    }
+
+    backend = make_url(url).get_backend_name()
+    if backend != 'sqlite':
+        options.update({
+            'pool_size': config.get('DB_POOL_SIZE', 10),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30)
+        })
+
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+    if statement_timeout and backend == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+
+    return options
+
+
+def configure_engines(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS and the replica bind before db.init_app"""
+    config = app.config
+    if 'SQLALCHEMY_ENGINE_OPTIONS' not in config:
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(config, config['SQLALCHEMY_DATABASE_URI'])
+
+    replica_url = config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, {'url': replica_url, **build_engine_options(config, replica_url)})
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+def pool_stats(engine):
+    """Checked-in/out and overflow counts of an engine's pool (None where the pool has no such count)"""
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        stats[name] = method() if callable(method) else None
+    max_overflow = getattr(pool, '_max_overflow', None)
+    stats['max_overflow'] = max_overflow
+    stats['exhausted'] = bool(
+        stats['size'] is not None and max_overflow is not None and max_overflow >= 0
+        and stats['checkedin'] == 0 and stats['checkedout'] >= stats['size'] + max_overflow
+    )
+    return stats
+
+
+class PoolMonitor:
+    """Pool statistics for every configured engine (primary and binds)"""
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+
+    def engines(self):
+        with self.app.app_context():
+            return {key or 'primary': engine for key, engine in self.db.engines.items()}
+
+    def stats(self):
+        """Flat numeric stats, e.g. primary_checkedout, for the metrics exporter"""
+        flat = {}
+        for name, engine in self.engines().items():
+            for key, value in pool_stats(engine).items():
+                if isinstance(value, (int, bool)):
+                    flat[f'{name}_{key}'] = int(value)
+        return flat
+
+
+def init_pool_monitoring(app, db):
+    """Register pool statistics and the /healthz endpoint"""
+    monitor = PoolMonitor(app, db)
+    app.extensions['db_pool'] = monitor
+
+    @app.route('/healthz')
+    def healthz():
+        """
+        Database health without waiting on the pool
+        An exhausted pool is reported as unhealthy instead of queueing for a
+        connection; otherwise one connection is checked out for SELECT 1.
+        """
+        databases = {}
+        healthy = True
+
+        for name, engine in monitor.engines().items():
+            stats = pool_stats(engine)
+            if stats['exhausted']:
+                databases[name] = {'status': 'exhausted', **stats}
+                healthy = False
+                continue
+
+            try:
+                with engine.connect() as connection:
+                    connection.exec_driver_sql('SELECT 1')
+                databases[name] = {'status': 'ok', **pool_stats(engine)}
+            except Exception as e:
+                databases[name] = {'status': 'error', 'error': str(e), **stats}
+                healthy = False
+
+        return jsonify({
+            'status': 'ok' if healthy else 'unavailable',
+            'databases': databases
+        }), 200 if healthy else 503
+
+    return monitor
@@ -0,0 +1,51 @@
+from functools import wraps
+from flask import g, has_request_context, request
+from sqlalchemy.sql import Select
+from app.utils.db_pool import REPLICA_BIND
+
+
+def use_replica(fn):
+    """
+    Let a read-only view run its SELECTs on the replica bind
+    Only GET requests are routed, and only while the request has not
+    written anything; without DATABASE_REPLICA_URL this is a no-op.
+    Place it below the auth decorator, and leave it off @cached_response
+    views: a cache entry filled from a lagging replica would outlive the lag.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if request.method == 'GET':
+            g.db_route = REPLICA_BIND
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def stick_to_primary():
+    """Send every later statement of this request to the primary"""
+    if has_request_context():
+        g.db_wrote = True
+
+
+def _is_plain_read(clause):
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def route_bind(session, clause):
+    """
+    Engine for a statement under the per-request routing rules (None for the default)
+    The replica serves plain SELECTs of views marked with use_replica. A
+    flush or any other statement (INSERT/UPDATE/DELETE, SELECT ... FOR
+    UPDATE, raw SQL) goes to the primary and pins the rest of the request
+    there, so a view reads its own writes.
+    """
+    if not has_request_context() or g.get('db_route') != REPLICA_BIND:
+        return None
+
+    if session._flushing or not _is_plain_read(clause):
+        stick_to_primary()
+        return None
+
+    if g.get('db_wrote'):
+        return None
+
+    return session._db.engines.get(REPLICA_BIND)
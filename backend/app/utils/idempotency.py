@@ -0,0 +1,286 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, g, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+# Record state of a key whose first request is still running
+PENDING = 'pending'
+
+
+class MemoryIdempotencyStore:
+    """In-process key store with per-entry TTL and LRU eviction"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _get(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+
+        record, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return record
+
+    def _set(self, key, record, ttl):
+        self._entries[key] = (record, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def reserve(self, key, record, ttl):
+        """Store record unless the key exists; returns the existing record or None"""
+        with self._lock:
+            existing = self._get(key)
+            if existing is None:
+                self._set(key, record, ttl)
+            return existing
+
+    def complete(self, key, record, ttl):
+        with self._lock:
+            self._set(key, record, ttl)
+
+    def release(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisIdempotencyStore:
+    """
+    Key store in any Redis-protocol server, shared by all workers
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url, key_prefix='agrilink:idempotency:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+        self.evictions = 0  # expiry is handled by the server
+
+    def reserve(self, key, record, ttl):
+        key = self.key_prefix + key
+        if self.client.set(key, json.dumps(record), ex=max(1, int(ttl)), nx=True):
+            return None
+        raw = self.client.get(key)
+        # Expired between SET NX and GET; treat as still running rather than racing
+        return json.loads(raw) if raw is not None else record
+
+    def complete(self, key, record, ttl):
+        self.client.set(self.key_prefix + key, json.dumps(record), ex=max(1, int(ttl)))
+
+    def release(self, key):
+        self.client.delete(self.key_prefix + key)
+
+    def size(self):
+        return None
+
+
+class DatabaseIdempotencyStore:
+    """
+    Key store in the idempotency_keys table, shared by all workers
+    Uses its own short transactions on the primary, so a reservation is
+    visible to other workers before the view runs and survives the view's
+    rollback. The primary key makes a concurrent reservation lose cleanly.
+    """
+
+    def __init__(self):
+        self.evictions = 0  # expired rows are replaced or purged, not evicted
+
+    @staticmethod
+    def _table():
+        from app.models.idempotency_key import IdempotencyKey
+        return IdempotencyKey.__table__
+
+    def reserve(self, key, record, ttl):
+        table = self._table()
+        now = datetime.utcnow()
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.key == key, table.c.expires_at <= now))
+            inserted = conn.execute(
+                insert(table).values(key=key, record=json.dumps(record), expires_at=now + timedelta(seconds=ttl))
+                .on_conflict_do_nothing(index_elements=['key'])
+            ).rowcount
+            if inserted == 1:
+                return None
+            raw = conn.execute(select(table.c.record).where(table.c.key == key)).scalar()
+        # Released between the INSERT and the SELECT; treat as still running rather than racing
+        return json.loads(raw) if raw is not None else record
+
+    def complete(self, key, record, ttl):
+        table = self._table()
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.key == key).values(
+                record=json.dumps(record), expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+            ))
+
+    def release(self, key):
+        table = self._table()
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.key == key))
+
+    def purge_expired(self):
+        """Delete expired keys; returns how many were removed"""
+        table = self._table()
+        with db.engine.begin() as conn:
+            return conn.execute(table.delete().where(table.c.expires_at <= datetime.utcnow())).rowcount
+
+    def size(self):
+        table = self._table()
+        with db.engine.connect() as conn:
+            return conn.execute(select(db.func.count()).select_from(table)).scalar()
+
+
+class IdempotencyKeys:
+    """
+    Remembers the successful response to each (user, endpoint, Idempotency-Key)
+    A replay of a finished request gets the stored response back without
+    running the view; a replay while the first request is still running
+    gets 409. Keys are stored hashed, with a fingerprint of the request so
+    reusing a key for a different request is rejected.
+    """
+
+    def __init__(self, store, ttl=86400, lock_timeout=60):
+        self.store = store
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.replays = 0
+        self.conflicts = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def run(self, key, scope, fn, *args, **kwargs):
+        store_key = hashlib.sha256(f'{scope}:{request.endpoint}:{key}'.encode()).hexdigest()[:32]
+        fingerprint = hashlib.sha256(
+            request.method.encode() + request.full_path.encode() + request.get_data()
+        ).hexdigest()[:16]
+
+        existing = self.store.reserve(store_key, {'state': PENDING, 'fingerprint': fingerprint}, self.lock_timeout)
+        if existing is not None:
+            if existing['fingerprint'] != fingerprint:
+                return jsonify({'message': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+            if existing['state'] == PENDING:
+                self._count('conflicts')
+                return jsonify({'message': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'}), 409
+
+            self._count('replays')
+            response = current_app.response_class(existing['body'], status=existing['status'],
+                                                  mimetype=existing['mimetype'])
+            response.headers[REPLAYED_HEADER] = 'true'
+            return response
+
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            self.store.release(store_key)
+            raise
+
+        # Only successes are remembered; a rejected request changed nothing and
+        # may succeed when retried later (e.g. once stock is back)
+        if not 200 <= response.status_code < 300 or response.is_streamed:
+            self.store.release(store_key)
+        else:
+            self.store.complete(store_key, {
+                'state': 'done',
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'body': response.get_data(as_text=True),
+                'mimetype': response.mimetype
+            }, self.ttl)
+        return response
+
+    def stats(self):
+        return {
+            'store': type(self.store).__name__,
+            'entries': self.store.size(),
+            'evictions': self.store.evictions,
+            'replays': self.replays,
+            'conflicts': self.conflicts
+        }
+
+
+def init_idempotency(app):
+    """
+    Create the Idempotency-Key store configured by IDEMPOTENCY_BACKEND
+    'database' (the default) and 'redis' are shared by every worker; 'memory'
+    only sees retries that land on the same process, so with
+    IDEMPOTENCY_REQUIRE_SHARED_STORE (production) it is refused when
+    WEB_CONCURRENCY says more than one worker serves the app.
+    """
+    backend = app.config.get('IDEMPOTENCY_BACKEND', 'database')
+    if backend == 'redis':
+        store = RedisIdempotencyStore(app.config['IDEMPOTENCY_REDIS_URL'])
+    elif backend == 'database':
+        store = DatabaseIdempotencyStore()
+    elif app.config.get('IDEMPOTENCY_REQUIRE_SHARED_STORE') and app.config.get('WEB_CONCURRENCY', 1) > 1:
+        raise RuntimeError(
+            'IDEMPOTENCY_BACKEND=memory only recognises retries that reach the same worker; '
+            'use IDEMPOTENCY_BACKEND=database or redis'
+        )
+    else:
+        store = MemoryIdempotencyStore(app.config.get('IDEMPOTENCY_MAX_ENTRIES', 10000))
+
+    app.extensions['idempotency'] = IdempotencyKeys(
+        store,
+        ttl=app.config.get('IDEMPOTENCY_TTL', 86400),
+        lock_timeout=app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', 60)
+    )
+    return app.extensions['idempotency']
+
+
+def _request_scope():
+    """Whose keys these are: the authenticated user, or the client address for public endpoints"""
+    if g.get('user_id') is not None:
+        return f'user:{g.user_id}'
+
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    return f'user:{identity}' if identity is not None else f'ip:{request.remote_addr}'
+
+
+def idempotent(fn):
+    """
+    Decorator making a mutating endpoint safe to retry with an Idempotency-Key header
+    Requests without the header run normally. Place it below the auth decorator.
+    Usage:
+        @orders_bp.route('/confirm', methods=['POST'])
+        @buyer_required
+        @idempotent
+        def confirm_order(): ...
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        keys = current_app.extensions.get('idempotency')
+        if not key or keys is None:
+            return fn(*args, **kwargs)
+
+        if len(key) > 255:
+            return jsonify({'message': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'}), 400
+
+        return keys.run(key, _request_scope(), fn, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,135 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# Credentials that can appear in logged URLs (e.g. werkzeug's access log)
+_SECRET_QUERY_PARAM = re.compile(r'\b((?:token|ticket|access_token|refresh_token)=)[^&\s"]+')
+
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request id and extras"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None)
+        }
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request's id (None outside requests)"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a background listener thread instead of writing them
+    Runs on the logging thread only to resolve the message and traceback
+    text, redacting token query parameters; drops records rather than
+    blocking when the queue is full.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.message = _SECRET_QUERY_PARAM.sub(r'\1[REDACTED]', record.getMessage())
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _stop_listener():
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def init_logging(app):
+    """
+    Route all logging through a queue to one stdout writer thread
+    LOG_FORMAT is 'json' or 'text', LOG_LEVEL the root level and LOG_LEVELS
+    a {logger name: level} mapping for per-module overrides.
+    """
+    global _listener, _queue_handler
+
+    # create_app may run more than once per process (tests, CLI)
+    _stop_listener()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s'
+        ))
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(app.config.get('LOG_QUEUE_SIZE', 10000)))
+    _queue_handler.addFilter(RequestIdFilter())
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, stream_handler)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    for name, level in app.config.get('LOG_LEVELS', {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    # Flask's own stderr handler would write every app.logger record twice
+    app.logger.removeHandler(default_handler)
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def expose_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+
+atexit.register(_stop_listener)
@@ -0,0 +1,226 @@
+import bisect
+import hmac
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Extensions whose stats() are exported as gauges
+COMPONENTS = ('db_pool', 'audit_sink', 'view_counter', 'response_cache', 'notify_broker', 'idempotency')
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}')
+        lines.append(f'{name}_sum{_labels(labels)} {self.sum:.6f}')
+        lines.append(f'{name}_count{_labels(labels)} {self.count}')
+        return lines
+
+
+def _labels(labels, **extra):
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs.items()) + '}'
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request metrics aggregated in process
+    Latency, SQL statement count and time, and response size are recorded
+    per (method, endpoint); to_dict time per model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.sql_queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.sql_time = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.response_size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.serialization = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+
+    def record_request(self, method, endpoint, status, duration, sql_count, sql_time, size):
+        key = (('method', method), ('endpoint', endpoint))
+        with self._lock:
+            self.requests[key + (('status', status),)] += 1
+            self.latency[key].observe(duration)
+            self.sql_queries[key].observe(sql_count)
+            self.sql_time[key].observe(sql_time)
+            if size is not None:
+                self.response_size[key].observe(size)
+
+    def record_serialization(self, model, duration):
+        with self._lock:
+            self.serialization[(('model', model),)].observe(duration)
+
+    def render(self, app):
+        lines = []
+        with self._lock:
+            lines += ['# TYPE http_requests_total counter']
+            lines += [f'http_requests_total{_labels(dict(key))} {count}' for key, count in sorted(self.requests.items())]
+            for name, histograms in (
+                ('http_request_duration_seconds', self.latency),
+                ('http_request_sql_queries', self.sql_queries),
+                ('http_request_sql_duration_seconds', self.sql_time),
+                ('http_response_size_bytes', self.response_size),
+                ('serialization_duration_seconds', self.serialization)
+            ):
+                lines.append(f'# TYPE {name} histogram')
+                for key, histogram in sorted(histograms.items()):
+                    lines += histogram.render(name, dict(key))
+
+        lines.append('# TYPE component_stat gauge')
+        for component in COMPONENTS:
+            extension = app.extensions.get(component)
+            if extension is None or not hasattr(extension, 'stats'):
+                continue
+            for stat, value in extension.stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'component_stat{_labels({"component": component, "stat": stat})} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_count' in g:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if starts and has_request_context() and 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_time += time.perf_counter() - starts.pop()
+
+
+def _timed_serialization(fn, model):
+    """Record how long a model's serializer takes (outermost call per request only)"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not has_request_context() or g.get('serializing'):
+            return fn(*args, **kwargs)
+
+        g.serializing = True
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            g.serializing = False
+            duration = time.perf_counter() - start
+            g.serialization_time = g.get('serialization_time', 0.0) + duration
+            metrics = current_app.extensions.get('request_metrics')
+            if metrics is not None:
+                metrics.record_serialization(model, duration)
+
+    wrapper.timed_serialization = True
+    return wrapper
+
+
+def _instrument_models(model_base):
+    """Time every model's to_dict/to_dict_many"""
+    for mapper in model_base.registry.mappers:
+        cls = mapper.class_
+        for name in ('to_dict', 'to_dict_many'):
+            attribute = cls.__dict__.get(name)
+            if attribute is None:
+                continue
+
+            is_descriptor = isinstance(attribute, (classmethod, staticmethod))
+            fn = attribute.__func__ if is_descriptor else attribute
+            if getattr(fn, 'timed_serialization', False):
+                continue
+
+            timed = _timed_serialization(fn, cls.__name__)
+            setattr(cls, name, type(attribute)(timed) if is_descriptor else timed)
+
+
+def init_metrics(app):
+    """
+    Register request instrumentation and the /metrics endpoint
+    Enabled by METRICS_ENABLED; METRICS_SERVER_TIMING also adds a
+    Server-Timing header (app, db, serialization) to every response.
+    /metrics is registered only with METRICS_ENDPOINT_ENABLED and, when
+    METRICS_TOKEN is set, answers 401 to requests without it as a bearer token.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return None
+
+    from app import db, models  # noqa: F401 - every model must be mapped before instrumenting
+
+    metrics = RequestMetrics()
+    app.extensions['request_metrics'] = metrics
+    server_timing = app.config.get('METRICS_SERVER_TIMING', False)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    # Every bind (primary and replica) counts towards a request's SQL
+    for engine in engines:
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    _instrument_models(db.Model)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.serialization_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_start' not in g:
+            return response
+
+        duration = time.perf_counter() - g.request_start
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        # Streamed responses have no known length
+        size = None if response.is_streamed else response.calculate_content_length()
+
+        metrics.record_request(request.method, endpoint, response.status_code, duration,
+                               g.sql_count, g.sql_time, size)
+
+        if server_timing:
+            response.headers['Server-Timing'] = (
+                f'app;dur={duration * 1000:.1f}, '
+                f'db;dur={g.sql_time * 1000:.1f};desc="{g.sql_count} queries", '
+                f'serialize;dur={g.serialization_time * 1000:.1f}'
+            )
+        return response
+
+    if app.config.get('METRICS_ENDPOINT_ENABLED', True):
+        token = app.config.get('METRICS_TOKEN')
+
+        @app.route('/metrics')
+        def metrics_endpoint():
+            """Prometheus text exposition of the request metrics"""
+            if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                return {'message': 'Missing or invalid metrics token'}, 401
+            return app.response_class(metrics.render(app), mimetype='text/plain; version=0.0.4')
+
+    return metrics
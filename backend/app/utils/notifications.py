@@ -0,0 +1,200 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from flask import current_app, has_app_context
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBroker:
+    """
+    In-process pub/sub of per-user events
+    Each subscriber gets a bounded queue; events for a slow subscriber are
+    dropped rather than blocking the publisher. Only reaches clients
+    connected to the same process.
+    """
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def subscribe(self, user_id):
+        subscription = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id, event):
+        """Hand an event to this process's subscribers of a user"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'broker': type(self).__name__,
+                'subscribed_users': len(self._subscribers),
+                'connections': sum(len(subs) for subs in self._subscribers.values()),
+                'dropped': self.dropped
+            }
+
+
+class RedisBroker(MemoryBroker):
+    """
+    Pub/sub across worker processes through a Redis-protocol server
+    Events are published to Redis and a listener thread in every process
+    relays them to that process's local subscribers. Requires the optional
+    `redis` package.
+    """
+
+    def __init__(self, url, channel_prefix='agrilink:notify:', max_queue_size=100):
+        import redis
+        super().__init__(max_queue_size)
+        self.client = redis.Redis.from_url(url)
+        self.channel_prefix = channel_prefix
+        self._listener = None
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, event):
+        self.client.publish(f'{self.channel_prefix}{user_id}', json.dumps(event))
+
+    def _ensure_listener(self):
+        # Started lazily so forked workers get their own thread
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='notify-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self.channel_prefix}*')
+        for item in pubsub.listen():
+            try:
+                user_id = int(item['channel'].decode().rsplit(':', 1)[-1])
+                self.deliver(user_id, json.loads(item['data']))
+            except (ValueError, KeyError):
+                logger.warning('Ignoring malformed notification on %s', item.get('channel'))
+
+
+def init_notifications(app):
+    """
+    Create the broker configured by NOTIFY_BROKER ('memory' or 'redis')
+    With NOTIFY_REQUIRE_SHARED_BROKER (production) the memory broker is
+    refused when WEB_CONCURRENCY says more than one worker serves the app:
+    a message handled by one worker would never reach streams held by another.
+    """
+    if app.config.get('NOTIFY_BROKER', 'memory') == 'redis':
+        broker = RedisBroker(app.config['NOTIFY_REDIS_URL'])
+    elif app.config.get('NOTIFY_REQUIRE_SHARED_BROKER') and app.config.get('WEB_CONCURRENCY', 1) > 1:
+        raise RuntimeError(
+            'NOTIFY_BROKER=memory only reaches clients of its own worker; '
+            'set NOTIFY_BROKER=redis or run a single worker (WEB_CONCURRENCY=1)'
+        )
+    else:
+        broker = MemoryBroker()
+    app.extensions['notify_broker'] = broker
+    return broker
+
+
+def format_sse(event):
+    """Encode an event dict as a Server-Sent Events frame"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def event_stream(app, broker, user_id, initial_events, keepalive_interval=15.0, max_age=None):
+    """
+    SSE frames for a connected client; pass the generator to a Response
+    Nothing happens until the response starts streaming, so an abandoned
+    response leaks no subscription. It then subscribes before calling
+    initial_events() in an app context, so no event is missed in between.
+    The stream holds no database session and sends a comment line when idle
+    so proxies keep the connection open. After max_age seconds it sends a
+    reconnect event and ends, so no stream outlives the worker timeout; the
+    client reconnects with a fresh ticket. Unsubscribes when it ends.
+    """
+    subscription = broker.subscribe(user_id)
+    deadline = time.monotonic() + max_age if max_age else None
+    try:
+        with app.app_context():
+            events = initial_events()
+        for event in events:
+            yield format_sse(event)
+        while True:
+            timeout = keepalive_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield format_sse({'type': 'reconnect'})
+                    return
+                timeout = min(timeout, remaining)
+            try:
+                event = subscription.get(timeout=timeout)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(user_id, subscription)
+
+
+def issue_stream_ticket(user_id):
+    """
+    Short-lived ticket letting an EventSource open the notification stream
+    EventSource cannot send an Authorization header, and an access token in
+    the URL would end up in access logs. A ticket only opens the stream and
+    expires after NOTIFY_STREAM_TICKET_TTL seconds.
+    """
+    return _ticket_serializer().dumps(user_id)
+
+
+def read_stream_ticket(ticket):
+    """User id of a valid stream ticket, or None if it is forged or expired"""
+    try:
+        user_id = _ticket_serializer().loads(ticket, max_age=current_app.config.get('NOTIFY_STREAM_TICKET_TTL', 60))
+    except BadData:
+        return None
+    return user_id if isinstance(user_id, int) else None
+
+
+def _ticket_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='notify-stream')
+
+
+def notify_user(user_id, event_type, **payload):
+    """Push an event to every connected client of a user (call after commit)"""
+    broker = current_app.extensions.get('notify_broker') if has_app_context() else None
+    if broker is None:
+        return
+    try:
+        broker.publish(user_id, {'type': event_type, **payload})
+    except Exception:
+        # Notifications are best-effort; clients resync on reconnect
+        logger.exception('Failed to publish %s notification to user %s', event_type, user_id)
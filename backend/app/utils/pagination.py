@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from app import db
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return python_type(value)
+
+
+def sort_signature(columns, descending=True):
+    """Identifies a sort order, so a cursor cannot be replayed against another one"""
+    return ','.join(str(column) for column in columns) + (':desc' if descending else ':asc')
+
+
+def encode_cursor(values, sort=None):
+    """Encode the sort key of the last row on a page (and the sort it belongs to) as an opaque string"""
+    payload = {'sort': sort, 'values': [_encode_value(value) for value in values]}
+    raw = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns, sort=None):
+    """Decode a cursor produced by encode_cursor() back into typed column values"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict) or payload.get('sort') != sort:
+            raise InvalidCursor('Cursor does not match the requested sort order')
+
+        values = payload.get('values')
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursor('Cursor does not match the requested sort order')
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, ArithmeticError) as e:
+        # ArithmeticError covers decimal.InvalidOperation from a tampered price
+        raise InvalidCursor('Invalid cursor') from e
+
+
+# Largest page keyset_paginate serves, whatever ?per_page= asks for
+MAX_PER_PAGE = 100
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query"""
+
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    def meta(self):
+        """Pagination fields for the JSON response"""
+        data = {
+            'next_cursor': self.next_cursor,
+            'has_more': self.next_cursor is not None
+        }
+        if self.total is not None:
+            data['total'] = self.total
+        return data
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, descending=True, with_total=False,
+                    max_per_page=MAX_PER_PAGE):
+    """
+    Paginate a query by seeking past the last seen sort key instead of OFFSET
+    `columns` must end with a unique column (normally the primary key) so the
+    ordering is total; an empty cursor starts from the first page. Any
+    existing ORDER BY on the query is replaced. Like paginate(error_out=False),
+    a per_page below 1 falls back to 20; it is also capped at max_per_page.
+    """
+    if per_page is None or per_page < 1:
+        per_page = 20
+    per_page = min(per_page, max_per_page)
+    total = query.order_by(None).count() if with_total else None
+    sort = sort_signature(columns, descending)
+
+    if cursor:
+        key = db.tuple_(*columns)
+        values = db.tuple_(*[
+            db.literal(value, type_=column.type)
+            for column, value in zip(columns, decode_cursor(cursor, columns, sort))
+        ])
+        query = query.filter(key < values if descending else key > values)
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns], sort)
+
+    return KeysetPage(rows, next_cursor, total)
@@ -0,0 +1,25 @@
+"""
+Pytest helpers for query budgets
+Enable from a conftest.py that provides an `app` fixture:
+    pytest_plugins = ['app.utils.pytest_plugin']
+"""
+from contextlib import contextmanager
+import pytest
+from app.utils.query_counter import assert_max_queries
+
+
+@pytest.fixture
+def query_budget(app):
+    """
+    Fail the test when a block runs more SQL statements than its budget
+    Usage:
+        def test_list_products(client, query_budget):
+            with query_budget(4):
+                client.get('/api/products/')
+    The failure lists every statement and groups repeated ones (N+1).
+    """
+    @contextmanager
+    def budget(limit):
+        with app.app_context(), assert_max_queries(limit) as counter:
+            yield counter
+    return budget
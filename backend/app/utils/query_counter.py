@@ -0,0 +1,65 @@
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+from app.utils.query_detector import fingerprint
+
+
+class QueryCounter:
+    """Records SQL statements executed on a set of engines while active"""
+
+    def __init__(self, engines):
+        self.engines = list(engines)
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def start(self):
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def stop(self):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    Count SQL statements executed inside the block
+    Every bind (primary and replica) is counted unless an engine is given.
+    Usage:
+        with count_queries() as counter:
+            client.get('/api/products/')
+        print(counter.count)
+    """
+    counter = QueryCounter([engine] if engine is not None else db.engines.values()).start()
+    try:
+        yield counter
+    finally:
+        counter.stop()
+
+
+@contextmanager
+def assert_max_queries(limit, engine=None):
+    """Fail with the offending statements if the block runs more than `limit` queries"""
+    with count_queries(engine) as counter:
+        yield counter
+
+    if counter.count > limit:
+        statements = '\n'.join(f'  {idx + 1}. {sql}' for idx, sql in enumerate(counter.statements))
+        repeated = '\n'.join(
+            f'  {count}x {sql}'
+            for sql, count in Counter(fingerprint(sql) for sql in counter.statements).most_common()
+            if count > 1
+        )
+        message = f'Expected at most {limit} queries, got {counter.count}:\n{statements}'
+        if repeated:
+            message += f'\nRepeated statements (possible N+1):\n{repeated}'
+        raise AssertionError(message)
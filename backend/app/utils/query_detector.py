@@ -0,0 +1,145 @@
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+def fingerprint(statement):
+    """Normalize a SQL statement so executions differing only in values compare equal"""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PLACEHOLDER_LIST.sub('(...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+def _caller():
+    """Innermost application frame outside app/utils that issued the statement"""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(_APP_ROOT) and not filename.startswith(_UTILS_DIR):
+            return f'{os.path.relpath(filename, os.path.dirname(_APP_ROOT))}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class QueryDetector:
+    """
+    Flags N+1 patterns and slow statements per request (development/test aid)
+    Statements are fingerprinted; a fingerprint executed at least
+    repeat_threshold times in one request, or any statement slower than
+    slow_ms, is logged with the route, the models it touches and the
+    application line that issued it.
+    """
+
+    def __init__(self, app, engines, model_base):
+        self.repeat_threshold = app.config.get('QUERY_DETECTOR_REPEAT_THRESHOLD', 5)
+        self.slow_seconds = app.config.get('QUERY_DETECTOR_SLOW_MS', 100) / 1000.0
+        self.models = {
+            mapper.local_table.name: mapper.class_.__name__
+            for mapper in model_base.registry.mappers
+            if getattr(mapper.local_table, 'name', None)
+        }
+
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def models_in(self, statement):
+        tables = dict.fromkeys(_TABLE_REFERENCE.findall(statement))
+        return [self.models.get(table, table) for table in tables]
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or 'query_fingerprints' not in g:
+            return
+
+        key = fingerprint(statement)
+        g.query_fingerprints[key] += 1
+        # Only pay for a stack walk once a pattern starts repeating
+        if g.query_fingerprints[key] == self.repeat_threshold:
+            g.query_callers[key] = _caller()
+        conn.info.setdefault('detector_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('detector_start')
+        if not starts or not has_request_context() or 'query_fingerprints' not in g:
+            return
+
+        duration = time.perf_counter() - starts.pop()
+        if duration >= self.slow_seconds:
+            g.slow_queries.append((statement, duration, _caller()))
+
+    def start_request(self):
+        g.query_fingerprints = Counter()
+        g.query_callers = {}
+        g.slow_queries = []
+
+    def report(self):
+        """Log this request's findings; returns how many were found"""
+        if 'query_fingerprints' not in g:
+            return 0
+
+        route = f'{request.method} {request.url_rule.rule if request.url_rule else request.path}'
+        findings = 0
+
+        for key, count in g.query_fingerprints.most_common():
+            if count < self.repeat_threshold:
+                break
+            findings += 1
+            logger.warning('Possible N+1: statement ran %d times in %s', count, route, extra={
+                'route': route,
+                'models': self.models_in(key),
+                'statement': key,
+                'executions': count,
+                'caller': g.query_callers.get(key)
+            })
+
+        for statement, duration, caller in g.slow_queries:
+            findings += 1
+            logger.warning('Slow query: %.1f ms in %s', duration * 1000, route, extra={
+                'route': route,
+                'models': self.models_in(statement),
+                'statement': fingerprint(statement),
+                'duration_ms': round(duration * 1000, 1),
+                'caller': caller
+            })
+
+        return findings
+
+
+def init_query_detector(app):
+    """Enable the detector when QUERY_DETECTOR_ENABLED (development and testing)"""
+    if not app.config.get('QUERY_DETECTOR_ENABLED', False):
+        return None
+
+    from app import db, models  # noqa: F401 - every model must be mapped for attribution
+
+    with app.app_context():
+        detector = QueryDetector(app, db.engines.values(), db.Model)
+    app.extensions['query_detector'] = detector
+
+    @app.before_request
+    def start_query_detection():
+        detector.start_request()
+
+    @app.after_request
+    def report_query_findings(response):
+        findings = detector.report()
+        if findings:
+            response.headers['X-Query-Warnings'] = str(findings)
+        return response
+
+    return detector
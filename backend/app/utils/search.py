@@ -0,0 +1,68 @@
+import re
+from sqlalchemy import func, literal_column, select, text
+from app import db
+from app.models.farmer_product import FarmerProduct, SEARCH_CONFIG, SEARCH_FTS_TABLE, SEARCH_INDEX, \
+    SQLITE_SEARCH_DDL
+
+MAX_SEARCH_TERMS = 10
+_TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _search_terms(search):
+    """Split raw search input into safe lowercase terms"""
+    return _TERM_PATTERN.findall(search.lower())[:MAX_SEARCH_TERMS]
+
+
+def apply_product_search(query, search):
+    """
+    Restrict a FarmerProduct query to products matching the search text
+    Returns (query, relevance) where relevance is an ORDER BY clause
+    ranking best matches first, or None when no ranking is available
+    """
+    terms = _search_terms(search)
+    if not terms:
+        return query, None
+
+    dialect = db.engine.dialect.name
+
+    if dialect == 'postgresql':
+        # Prefix matching keeps search-as-you-type working
+        ts_query = func.to_tsquery(SEARCH_CONFIG, ' & '.join(f'{term}:*' for term in terms))
+        vector = FarmerProduct.search_vector()
+        query = query.filter(vector.op('@@')(ts_query))
+        return query, func.ts_rank(vector, ts_query).desc()
+
+    if dialect == 'sqlite':
+        fts = literal_column(SEARCH_FTS_TABLE)
+        matches = select(
+            literal_column('rowid').label('product_id'),
+            func.bm25(fts).label('rank')
+        ).select_from(text(SEARCH_FTS_TABLE)).where(
+            fts.op('MATCH')(' '.join(f'"{term}"*' for term in terms))
+        ).subquery()
+        query = query.join(matches, matches.c.product_id == FarmerProduct.id)
+        # bm25() scores are negative; lower means more relevant
+        return query, matches.c.rank.asc()
+
+    # Other backends: substring match without ranking
+    for term in terms:
+        query = query.filter(
+            db.or_(
+                FarmerProduct.name.ilike(f'%{term}%'),
+                FarmerProduct.description.ilike(f'%{term}%')
+            )
+        )
+    return query, None
+
+
+def rebuild_search_index():
+    """Create (if missing) and repopulate the product search index"""
+    dialect = db.engine.dialect.name
+
+    if dialect == 'postgresql':
+        # Expression index is maintained by PostgreSQL itself
+        SEARCH_INDEX.create(db.engine, checkfirst=True)
+    elif dialect == 'sqlite':
+        with db.engine.begin() as conn:
+            for statement in SQLITE_SEARCH_DDL:
+                conn.execute(text(statement))
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.user import User
+from app.models.farmer_product import FarmerProduct
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.category import Category
+
+
+def _count_if(condition):
+    """Conditional COUNT usable on every backend"""
+    return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+
+def compute_dashboard_stats():
+    """Admin dashboard counters and revenue from a handful of grouped aggregates"""
+    stats = {
+        'total_farmers': 0,
+        'active_farmers': 0,
+        'total_buyers': 0,
+        'active_buyers': 0
+    }
+
+    # Users by role and active flag
+    user_rows = db.session.query(
+        User.role, User.is_active, db.func.count(User.id)
+    ).filter(User.role.in_(['farmer', 'buyer'])).group_by(User.role, User.is_active).all()
+
+    for role, is_active, count in user_rows:
+        stats[f'total_{role}s'] += count
+        if is_active:
+            stats[f'active_{role}s'] += count
+
+    # Product counters in one pass
+    total_products, approved_products, pending_products = db.session.query(
+        db.func.count(FarmerProduct.id),
+        _count_if(FarmerProduct.is_approved == True),
+        _count_if(db.and_(FarmerProduct.is_approved == False, FarmerProduct.is_active == True))
+    ).one()
+
+    stats['total_products'] = total_products
+    stats['approved_products'] = int(approved_products)
+    stats['pending_products'] = int(pending_products)
+
+    # Orders and revenue by status
+    order_rows = db.session.query(
+        Order.status, db.func.count(Order.id), db.func.sum(Order.total_amount)
+    ).group_by(Order.status).all()
+
+    orders_by_status = {status: (count, amount) for status, count, amount in order_rows}
+    stats['total_orders'] = sum(count for count, _ in orders_by_status.values())
+    for status in ('pending', 'approved', 'rejected'):
+        stats[f'{status}_orders'] = orders_by_status.get(status, (0, None))[0]
+
+    stats['total_categories'] = db.session.query(db.func.count(Category.id)).scalar()
+
+    # Total revenue from approved orders
+    approved_amount = orders_by_status.get('approved', (0, None))[1]
+    stats['total_revenue'] = float(approved_amount) if approved_amount is not None else 0.0
+
+    return stats
+
+
+SERIES_INTERVALS = {'daily': 'day', 'weekly': 'week'}
+SERIES_MAX_DAYS = 366
+
+
+def _time_bucket(column, interval):
+    """Truncate a timestamp to the start of its day or (Monday-based) week in SQL"""
+    if db.engine.dialect.name == 'sqlite':
+        if interval == 'week':
+            return db.func.date(column, 'weekday 0', '-6 days')
+        return db.func.date(column)
+    return db.func.date_trunc(interval, column)
+
+
+def compute_farmer_analytics(farmer_id):
+    """Farmer product, order and engagement totals from two aggregate queries"""
+    # Product counters and views in one pass over the farmer's active products
+    product_row = db.session.query(
+        db.func.count(FarmerProduct.id),
+        _count_if(FarmerProduct.is_approved == True),
+        _count_if(FarmerProduct.is_approved == False),
+        _count_if(FarmerProduct.is_out_of_stock == True),
+        db.func.coalesce(db.func.sum(FarmerProduct.view_count), 0)
+    ).filter(
+        FarmerProduct.farmer_id == farmer_id,
+        FarmerProduct.is_active == True
+    ).one()
+
+    # Order lines of any status, with revenue and quantity from approved orders only
+    is_approved_order = Order.status == 'approved'
+    order_row = db.session.query(
+        db.func.count(OrderItem.id),
+        db.func.coalesce(db.func.sum(db.case((is_approved_order, OrderItem.subtotal), else_=0)), 0),
+        db.func.coalesce(db.func.sum(db.case((is_approved_order, OrderItem.quantity), else_=0)), 0)
+    ).join(Order, Order.id == OrderItem.order_id).filter(
+        OrderItem.farmer_id == farmer_id
+    ).one()
+
+    total_products, approved, pending, out_of_stock, total_views = product_row
+    total_orders, total_revenue, total_items_sold = order_row
+
+    return {
+        'products': {
+            'total': total_products,
+            'approved': int(approved),
+            'pending': int(pending),
+            'out_of_stock': int(out_of_stock)
+        },
+        'orders': {
+            'total': total_orders,
+            'total_revenue': float(total_revenue),
+            'total_items_sold': int(total_items_sold)
+        },
+        'engagement': {
+            'total_views': int(total_views)
+        }
+    }
+
+
+def compute_farmer_sales_series(farmer_id, period='daily', days=30):
+    """Revenue and items sold per day/week for approved orders, bucketed in SQL"""
+    bucket = _time_bucket(Order.approved_at, SERIES_INTERVALS[period]).label('bucket')
+    since = datetime.utcnow() - timedelta(days=days)
+
+    rows = db.session.query(
+        bucket,
+        db.func.sum(OrderItem.subtotal),
+        db.func.sum(OrderItem.quantity)
+    ).join(Order, Order.id == OrderItem.order_id).filter(
+        OrderItem.farmer_id == farmer_id,
+        Order.status == 'approved',
+        Order.approved_at >= since
+    ).group_by(bucket).order_by(bucket).all()
+
+    return [{
+        'period_start': value.date().isoformat() if isinstance(value, datetime) else str(value),
+        'revenue': float(revenue or 0),
+        'items_sold': int(items_sold or 0)
+    } for value, revenue, items_sold in rows]
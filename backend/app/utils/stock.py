@@ -0,0 +1,97 @@
+from collections import Counter
+from sqlalchemy import select
+from app import db
+
+
+class InsufficientStock(ValueError):
+    """Raised when a product is missing or has less stock than requested"""
+
+    def __init__(self, product_id, requested, available=None, name=None):
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+        self.name = name
+        super().__init__(f'Insufficient stock for product {product_id}: requested {requested}, available {available}')
+
+
+def order_quantities(items):
+    """Total quantity per product_id for an iterable of order items"""
+    quantities = Counter()
+    for item in items:
+        quantities[item.product_id] += item.quantity
+    return quantities
+
+
+def lock_stock(product_ids):
+    """
+    {product_id: (name, quantity)} for many products, row-locked until commit
+    Locks are taken in product-id order, like reserve_stock, so they cannot
+    deadlock against it (FOR UPDATE is a no-op on SQLite).
+    """
+    from app.models.farmer_product import FarmerProduct
+
+    table = FarmerProduct.__table__
+    rows = db.session.execute(
+        select(table.c.id, table.c.name, table.c.quantity)
+        .where(table.c.id.in_(set(product_ids)))
+        .order_by(table.c.id)
+        .with_for_update()
+    ).all()
+    return {row.id: (row.name, row.quantity) for row in rows}
+
+
+def reserve_stock(quantities):
+    """
+    Deduct {product_id: quantity} from stock inside the caller's transaction
+    Each product is one conditional UPDATE ... WHERE quantity >= n, so the
+    check and the deduction are a single atomic statement holding only that
+    row's lock. Products are updated in id order so concurrent reservations
+    over overlapping products cannot deadlock. Raises InsufficientStock on
+    the first product that cannot be covered; the caller rolls back.
+    Returns {product_id: remaining quantity}.
+    """
+    from app.models.farmer_product import FarmerProduct
+
+    table = FarmerProduct.__table__
+    remaining = {}
+
+    for product_id in sorted(quantities):
+        requested = quantities[product_id]
+        new_quantity = table.c.quantity - requested
+        row = db.session.execute(
+            table.update()
+            .where(table.c.id == product_id, table.c.quantity >= requested)
+            .values(quantity=new_quantity, is_out_of_stock=new_quantity <= 0)
+            .returning(table.c.quantity)
+        ).first()
+
+        if row is None:
+            current = db.session.execute(
+                select(table.c.name, table.c.quantity).where(table.c.id == product_id)
+            ).first()
+            raise InsufficientStock(
+                product_id, requested,
+                available=current.quantity if current else None,
+                name=current.name if current else None
+            )
+
+        remaining[product_id] = row.quantity
+
+    return remaining
+
+
+def claim_pending_order(order_id, **values):
+    """
+    Move a pending order on with one conditional UPDATE (e.g. status='approved')
+    Returns False when the order was no longer pending, i.e. another request
+    got there first.
+    """
+    from app.models.order import Order
+
+    table = Order.__table__
+    result = db.session.execute(
+        table.update()
+        .where(table.c.id == order_id, table.c.status == 'pending')
+        .values(**values)
+    )
+    return result.rowcount == 1
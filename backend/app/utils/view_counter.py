@@ -0,0 +1,106 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+from sqlalchemy import case
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Coalesces product view increments in memory
+    Views are accumulated per product and written periodically with one
+    batched UPDATE ... SET view_count = view_count + n, so product detail
+    GETs never write to the database themselves.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 10.0)
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._worker = None
+        self.flushed_views = 0
+        self.flushes = 0
+        atexit.register(self.close)
+
+    def increment(self, product_id, count=1):
+        """Record views of a product to be written on the next flush"""
+        self._ensure_worker()
+        with self._lock:
+            self._pending[product_id] += count
+
+    def pending(self, product_id):
+        """Views of a product not yet written to the database"""
+        with self._lock:
+            return self._pending.get(product_id, 0)
+
+    def _ensure_worker(self):
+        # Started lazily so forked workers get their own thread
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stopping.clear()
+                self._worker = threading.Thread(target=self._run, name='view-counter', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write all pending increments in a single UPDATE"""
+        from app.models.farmer_product import FarmerProduct
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+
+        if not pending:
+            return
+
+        table = FarmerProduct.__table__
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(
+                        table.update()
+                        .where(table.c.id.in_(pending.keys()))
+                        .values(
+                            view_count=table.c.view_count + case(pending, value=table.c.id, else_=0),
+                            # A view is not an edit; keep updated_at unchanged
+                            updated_at=table.c.updated_at
+                        )
+                    )
+            with self._lock:
+                self.flushed_views += sum(pending.values())
+                self.flushes += 1
+        except Exception:
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                self._pending.update(pending)
+            logger.exception('Failed to flush view counts for %d products', len(pending))
+
+    def close(self):
+        """Stop the flusher and write whatever is pending (registered with atexit)"""
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(self.flush_interval)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending_products': len(self._pending),
+                'pending_views': sum(self._pending.values()),
+                'flushed_views': self.flushed_views,
+                'flushes': self.flushes
+            }
+
+
+def init_view_counter(app):
+    app.extensions['view_counter'] = ViewCounter(app)
+    return app.extensions['view_counter']
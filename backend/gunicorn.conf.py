@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for the API (loaded automatically from the backend directory)
+The notification stream holds a connection open for up to
+NOTIFY_STREAM_MAX_AGE seconds, so requests are served by threads: a stream
+ties up one thread, not a whole worker. More than one worker process needs
+NOTIFY_BROKER=redis, otherwise the app refuses to start in production.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4 if os.environ.get('NOTIFY_BROKER') == 'redis' else 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+timeout = 120
+
+
+def on_starting(server):
+    # Tell the app how many processes serve it (see NOTIFY_REQUIRE_SHARED_BROKER)
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
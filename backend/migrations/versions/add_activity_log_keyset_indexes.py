@@ -0,0 +1,27 @@
+"""add activity log keyset pagination indexes
+
+Revision ID: add_activity_log_keyset_indexes
+Revises: add_product_search_index
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_activity_log_keyset_indexes'
+down_revision = 'add_product_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('activity_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_activity_logs_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_activity_logs_action_created_at_id', ['action', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('activity_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_logs_action_created_at_id')
+        batch_op.drop_index('ix_activity_logs_created_at_id')
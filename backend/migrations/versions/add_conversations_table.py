@@ -0,0 +1,42 @@
+"""add conversations summary table
+
+Revision ID: add_conversations_table
+Revises: add_activity_log_keyset_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_conversations_table'
+down_revision = 'add_activity_log_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('thread_id', sa.String(length=100), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('other_user_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_id', sa.Integer(), nullable=True),
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_activity_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['other_user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['last_message_id'], ['messages.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('thread_id', 'user_id', name='_conversation_thread_user_uc')
+    )
+    op.create_index('ix_conversations_user_activity', 'conversations',
+                    ['user_id', 'last_activity_at', 'id'], unique=False)
+
+    # Populate from existing messages with: flask rebuild-conversations
+
+
+def downgrade():
+    op.drop_index('ix_conversations_user_activity', table_name='conversations')
+    op.drop_table('conversations')
@@ -0,0 +1,43 @@
+"""add product full-text search index
+
+Revision ID: add_product_search_index
+Revises: add_buyer_profile_image
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_product_search_index'
+down_revision = 'add_buyer_profile_image'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # GIN index over the same tsvector expression used by catalog search
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_farmer_products_search ON farmer_products "
+            "USING gin (to_tsvector('english'::regconfig, "
+            "coalesce(name, '') || ' ' || coalesce(description, '')))"
+        )
+    elif dialect == 'sqlite':
+        # FTS5 shadow table, synced by triggers and backfilled with 'rebuild'
+        from app.models.farmer_product import SQLITE_SEARCH_DDL
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_farmer_products_search')
+    elif dialect == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER IF EXISTS farmer_products_fts_{suffix}')
+        op.execute('DROP TABLE IF EXISTS farmer_products_fts')
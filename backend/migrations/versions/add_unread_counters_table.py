@@ -0,0 +1,35 @@
+"""add per-user unread message counters
+
+Revision ID: add_unread_counters_table
+Revises: add_conversations_table
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_unread_counters_table'
+down_revision = 'add_conversations_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('unread_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from existing messages; later drift is fixed with: flask reconcile-unread-counts
+    op.execute(
+        "INSERT INTO unread_counters (user_id, unread_count) "
+        "SELECT receiver_id, COUNT(id) FROM messages WHERE is_read = false GROUP BY receiver_id"
+    )
+
+
+def downgrade():
+    op.drop_table('unread_counters')
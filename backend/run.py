@@ -29,6 +29,36 @@ def init_db():
     db.create_all()
     print('Database initialized!')
 
+@app.cli.command()
+def rebuild_search_index():
+    """Create and repopulate the product full-text search index"""
+    from app.utils.search import rebuild_search_index as rebuild
+    rebuild()
+    print('Search index rebuilt!')
+
+@app.cli.command()
+def rebuild_conversations():
+    """Recompute conversation summaries from the messages table"""
+    from app.models.conversation import Conversation
+    Conversation.rebuild()
+    db.session.commit()
+    print('Conversation summaries rebuilt!')
+
+@app.cli.command()
+def reconcile_unread_counts():
+    """Recompute every user's unread message counter from the messages table"""
+    from app.models.unread_counter import UnreadCounter
+    UnreadCounter.reconcile()
+    db.session.commit()
+    print('Unread counters reconciled!')
+
+@app.cli.command()
+def purge_idempotency_keys():
+    """Delete expired Idempotency-Key records from the database store"""
+    from app.utils.idempotency import DatabaseIdempotencyStore
+    removed = DatabaseIdempotencyStore().purge_expired()
+    print(f'{removed} expired idempotency keys purged!')
+
 @app.cli.command()
 def seed_admin():
     """Create initial admin user"""
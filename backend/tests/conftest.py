@@ -0,0 +1,89 @@
+"""
+Shared fixtures: an app on a SQLite file database
+Set TEST_DATABASE_URL to run against Postgres instead. Modules that need a
+read replica override the replica_url fixture (see test_db_routing.py).
+"""
+import os
+import pytest
+from app import create_app, db
+from app.utils.db_pool import REPLICA_BIND
+from app.utils.pytest_plugin import query_budget  # noqa: F401 - re-exported fixture
+from config import TestingConfig
+
+
+@pytest.fixture
+def replica_url():
+    """No replica bind unless a module asks for one"""
+    return None
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, replica_url):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI',
+                        os.environ.get('TEST_DATABASE_URL') or f'sqlite:///{tmp_path / "primary.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATABASE_REPLICA_URL', replica_url)
+
+    app = create_app('testing')
+    with app.app_context():
+        # Models have no bind key; the replica gets the same schema below
+        db.create_all(bind_key=None)
+        if REPLICA_BIND in db.engines:
+            db.metadata.create_all(db.engines[REPLICA_BIND])
+
+    yield app
+
+    # Write buffered view counts while the tables still exist
+    app.extensions['view_counter'].close()
+    with app.app_context():
+        db.session.remove()
+        if REPLICA_BIND in db.engines:
+            db.metadata.drop_all(db.engines[REPLICA_BIND])
+        db.drop_all(bind_key=None)
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """Admin, farmer and buyer (password 'secret') and one approved product with 100 in stock"""
+    from app.models import User, FarmerProfile, BuyerProfile, Category, FarmerProduct, Cart
+
+    with app.app_context():
+        users = {}
+        for role in ('admin', 'farmer', 'buyer'):
+            user = User(email=f'{role}@example.com', role=role)
+            user.set_password('secret')
+            db.session.add(user)
+            users[role] = user
+        db.session.flush()
+
+        farmer = FarmerProfile(user_id=users['farmer'].id, full_name='Farmer One', farm_name='Green Farm')
+        buyer = BuyerProfile(user_id=users['buyer'].id, full_name='Buyer One')
+        category = Category(name='Vegetables')
+        db.session.add_all([farmer, buyer, category])
+        db.session.flush()
+
+        db.session.add(Cart(buyer_id=buyer.id))
+        product = FarmerProduct(farmer_id=farmer.id, category_id=category.id, name='Tomatoes', price=10,
+                                quantity=100, unit='kg', product_type='produce', is_approved=True)
+        db.session.add(product)
+        db.session.commit()
+
+        return {
+            'admin_id': users['admin'].id,
+            'farmer_id': farmer.id,
+            'buyer_id': buyer.id,
+            'product_id': product.id
+        }
+
+
+def login(client, email):
+    """Authorization header for a seeded user"""
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'secret'})
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': f'Bearer {response.get_json()["access_token"]}'}
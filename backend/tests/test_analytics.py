@@ -0,0 +1,14 @@
+import pytest
+from tests.conftest import login
+
+
+@pytest.mark.parametrize('days', [0, -1, 367, 10 ** 9])
+def test_series_rejects_days_out_of_range(client, seed, days):
+    response = client.get(f'/api/farmer/analytics?series=daily&days={days}', headers=login(client, 'farmer@example.com'))
+    assert response.status_code == 400
+
+
+def test_series_accepts_days_in_range(client, seed):
+    response = client.get('/api/farmer/analytics?series=weekly&days=366', headers=login(client, 'farmer@example.com'))
+    assert response.status_code == 200
+    assert response.get_json()['series'] == {'period': 'weekly', 'days': 366, 'points': []}
@@ -0,0 +1,21 @@
+import pytest
+from config import TestingConfig
+from tests.conftest import login
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'CACHE_BACKEND', 'memory')
+
+
+def latest_farm_names(client):
+    return [product['farmer']['farm_name'] for product in client.get('/api/products/latest').get_json()['products']]
+
+
+def test_profile_update_invalidates_cached_catalog(client, seed):
+    assert latest_farm_names(client) == ['Green Farm']
+
+    response = client.patch('/api/farmer/profile', json={'farm_name': 'Blue Farm'},
+                            headers=login(client, 'farmer@example.com'))
+    assert response.status_code == 200
+    assert latest_farm_names(client) == ['Blue Farm']
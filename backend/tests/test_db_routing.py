@@ -0,0 +1,98 @@
+import os
+import pytest
+from flask import g
+from app import db
+from app.models import FarmerProduct, User
+from app.utils.db_pool import REPLICA_BIND
+from app.utils.query_counter import count_queries
+from tests.conftest import login
+
+
+@pytest.fixture
+def replica_url(tmp_path):
+    """Second SQLite file (or TEST_DATABASE_REPLICA_URL) standing in for the replica"""
+    return os.environ.get('TEST_DATABASE_REPLICA_URL') or f'sqlite:///{tmp_path / "replica.db"}'
+
+
+@pytest.fixture
+def replica(app, seed):
+    """Copy the seeded primary into the replica, then make the replica's product name differ"""
+    with app.app_context():
+        primary, replica_engine = db.engine, db.engines[REPLICA_BIND]
+        with primary.connect() as source, replica_engine.begin() as target:
+            for table in db.metadata.sorted_tables:
+                rows = [dict(row._mapping) for row in source.execute(table.select())]
+                if rows:
+                    target.execute(table.insert(), rows)
+            target.execute(
+                FarmerProduct.__table__.update()
+                .where(FarmerProduct.__table__.c.id == seed['product_id'])
+                .values(name='Replica Tomatoes')
+            )
+    return seed
+
+
+def test_marked_get_reads_from_replica(client, replica):
+    response = client.get(f'/api/products/{replica["product_id"]}')
+    assert response.get_json()['product']['name'] == 'Replica Tomatoes'
+
+
+def test_unmarked_get_reads_from_primary(client, replica):
+    headers = login(client, 'farmer@example.com')
+    response = client.get(f'/api/farmer/products/{replica["product_id"]}', headers=headers)
+    assert response.get_json()['product']['name'] == 'Tomatoes'
+
+
+def test_reads_after_a_write_stick_to_primary(app, replica):
+    with app.test_request_context('/', method='GET'):
+        g.db_route = REPLICA_BIND
+        assert db.session.get(FarmerProduct, replica['product_id']).name == 'Replica Tomatoes'
+
+        db.session.execute(
+            db.update(FarmerProduct).where(FarmerProduct.id == replica['product_id']).values(quantity=99)
+        )
+        db.session.expire_all()
+        assert db.session.get(FarmerProduct, replica['product_id']).name == 'Tomatoes'
+        db.session.rollback()
+
+
+def test_flush_pins_request_to_primary(app, replica):
+    with app.test_request_context('/', method='GET'):
+        g.db_route = REPLICA_BIND
+        product = db.session.get(FarmerProduct, replica['product_id'])
+        product.quantity = 50
+        db.session.flush()
+
+        db.session.expire_all()
+        assert db.session.get(FarmerProduct, replica['product_id']).name == 'Tomatoes'
+        db.session.rollback()
+
+
+def test_locking_reads_use_primary(app, replica):
+    with app.test_request_context('/', method='GET'):
+        g.db_route = REPLICA_BIND
+        product = db.session.execute(
+            db.select(FarmerProduct).where(FarmerProduct.id == replica['product_id']).with_for_update()
+        ).scalar_one()
+        assert product.name == 'Tomatoes'
+        db.session.rollback()
+
+
+def test_user_status_is_read_from_primary(app, client, replica):
+    headers = login(client, 'buyer@example.com')
+
+    # Deactivated on the primary only; the replica still says active
+    with app.app_context():
+        User.query.filter_by(email='buyer@example.com').update({'is_active': False})
+        db.session.commit()
+        buyer_id = User.query.filter_by(email='buyer@example.com').one().id
+    app.extensions['user_status_cache'].invalidate(buyer_id)
+
+    response = client.get('/api/buyer/orders', headers=headers)
+    assert response.status_code == 403
+
+
+def test_query_counter_counts_replica_statements(app, client, replica):
+    with app.app_context(), count_queries() as counter:
+        client.get(f'/api/products/{replica["product_id"]}')
+    assert counter.count > 0
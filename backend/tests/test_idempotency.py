@@ -0,0 +1,38 @@
+from app.models import Order
+from app.utils.idempotency import DatabaseIdempotencyStore
+from tests.conftest import login
+
+
+def test_retry_on_another_worker_is_replayed(app, client, seed):
+    headers = login(client, 'buyer@example.com')
+    assert client.post('/api/cart/items', json={'product_id': seed['product_id'], 'quantity': 2},
+                       headers=headers).status_code in (200, 201)
+    headers = {**headers, 'Idempotency-Key': 'checkout-1'}
+
+    first = client.post('/api/orders/confirm', json={}, headers=headers)
+    assert first.status_code == 201
+
+    # A fresh store instance stands in for a different worker process
+    app.extensions['idempotency'].store = DatabaseIdempotencyStore()
+    retry = client.post('/api/orders/confirm', json={}, headers=headers)
+
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    with app.app_context():
+        assert Order.query.count() == 1
+
+
+def test_database_store_reservations(app):
+    with app.app_context():
+        store, other = DatabaseIdempotencyStore(), DatabaseIdempotencyStore()
+        pending = {'state': 'pending', 'fingerprint': 'a'}
+
+        assert store.reserve('k', pending, ttl=60) is None
+        assert other.reserve('k', {'state': 'pending', 'fingerprint': 'b'}, ttl=60) == pending
+
+        store.release('k')
+        assert other.reserve('k', pending, ttl=-1) is None  # already expired
+        assert store.reserve('k', pending, ttl=60) is None
+        assert store.purge_expired() == 0
+        assert store.size() == 1
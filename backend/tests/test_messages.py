@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Conversation, Message, User
+from tests.conftest import login
+
+
+@pytest.fixture
+def thread(app, seed):
+    """A top-level message from the admin to the buyer with three replies"""
+    with app.app_context():
+        admin = User.query.filter_by(email='admin@example.com').one()
+        buyer = User.query.filter_by(email='buyer@example.com').one()
+        start = datetime.utcnow()
+        parent = Message(sender_id=admin.id, receiver_id=buyer.id, subject='Hello', message='Hi',
+                         thread_id='thread-1', created_at=start)
+        db.session.add(parent)
+        db.session.flush()
+        for index in range(3):
+            db.session.add(Message(sender_id=buyer.id, receiver_id=admin.id, subject='Re: Hello',
+                                   message=f'Reply {index}', thread_id='thread-1',
+                                   parent_message_id=parent.id, created_at=start + timedelta(seconds=index + 1)))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('reply_limit, loaded', [(2, ['Reply 1', 'Reply 2']), (0, ['Reply 2']), (-5, ['Reply 2'])])
+def test_reply_limit_keeps_full_reply_count(client, thread, reply_limit, loaded):
+    response = client.get(f'/api/messages/inbox?reply_limit={reply_limit}', headers=login(client, 'buyer@example.com'))
+    assert response.status_code == 200
+
+    message = response.get_json()['messages'][0]
+    assert message['reply_count'] == 3
+    assert [reply['message'] for reply in message['replies']] == loaded
+
+
+@pytest.mark.parametrize('up_to', [True, False, '3', 1.5, 10 ** 400, -1, 2 ** 31, [1]])
+def test_mark_thread_read_rejects_bad_high_water_marks(client, thread, up_to):
+    response = client.post('/api/messages/thread/thread-1/read', json={'up_to_message_id': up_to},
+                           headers=login(client, 'admin@example.com'))
+    assert response.status_code == 400
+
+
+def test_mark_thread_read_rejects_overflowing_number(client, thread):
+    response = client.post('/api/messages/thread/thread-1/read', data='{"up_to_message_id": 1e400}',
+                           content_type='application/json', headers=login(client, 'admin@example.com'))
+    assert response.status_code == 400
+
+
+def test_mark_thread_read_up_to_message(app, client, thread):
+    with app.app_context():
+        Conversation.rebuild()
+        db.session.commit()
+        first_reply = Message.query.filter(Message.parent_message_id.isnot(None)).order_by(Message.id).first().id
+
+    response = client.post('/api/messages/thread/thread-1/read', json={'up_to_message_id': first_reply},
+                           headers=login(client, 'admin@example.com'))
+    assert response.status_code == 200
+    assert response.get_json()['marked_read'] == 1
@@ -0,0 +1,33 @@
+import pytest
+from config import TestingConfig
+
+
+@pytest.fixture
+def metrics_token():
+    return 'scrape-secret'
+
+
+@pytest.fixture
+def metrics_endpoint_enabled():
+    return True
+
+
+@pytest.fixture(autouse=True)
+def metrics_config(monkeypatch, metrics_token, metrics_endpoint_enabled):
+    monkeypatch.setattr(TestingConfig, 'METRICS_TOKEN', metrics_token)
+    monkeypatch.setattr(TestingConfig, 'METRICS_ENDPOINT_ENABLED', metrics_endpoint_enabled)
+
+
+def test_metrics_require_token(client):
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+@pytest.mark.parametrize('metrics_endpoint_enabled', [False])
+def test_metrics_endpoint_can_be_disabled(client):
+    assert client.get('/metrics').status_code == 404
+
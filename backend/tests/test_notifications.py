@@ -0,0 +1,72 @@
+import logging
+import pytest
+from app.utils.log import NonBlockingQueueHandler
+from app.utils.notifications import MemoryBroker, event_stream, init_notifications
+from tests.conftest import login
+
+
+def stream_ticket(client, email):
+    response = client.post('/api/messages/stream-ticket', headers=login(client, email))
+    assert response.status_code == 200
+    return response.get_json()['ticket']
+
+
+def test_stream_opens_with_ticket(app, client, seed):
+    ticket = stream_ticket(client, 'buyer@example.com')
+
+    response = client.get(f'/api/messages/stream?ticket={ticket}')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    first = next(response.iter_encoded())
+    assert first == b'event: unread_count\ndata: {"type": "unread_count", "unread_count": 0}\n\n'
+    assert app.extensions['notify_broker'].stats()['connections'] == 1
+    response.close()
+    assert app.extensions['notify_broker'].stats()['connections'] == 0
+
+
+def test_stream_rejects_access_token_in_url(client, seed):
+    token = login(client, 'buyer@example.com')['Authorization'].split()[1]
+
+    assert client.get(f'/api/messages/stream?token={token}').status_code == 401
+    assert client.get(f'/api/messages/stream?ticket={token}').status_code == 401
+    assert client.get('/api/messages/stream?ticket=forged').status_code == 401
+
+
+def test_event_stream_subscribes_only_when_iterated(app):
+    broker = MemoryBroker()
+    stream = event_stream(app, broker, 1, lambda: [{'type': 'unread_count', 'unread_count': 2}])
+    assert broker.stats()['connections'] == 0
+
+    assert next(stream).endswith('"unread_count": 2}\n\n')
+    assert broker.stats()['connections'] == 1
+    stream.close()
+    assert broker.stats()['connections'] == 0
+
+
+def test_log_records_redact_tokens_in_urls():
+    record = logging.LogRecord('werkzeug', logging.INFO, __file__, 1,
+                               '"GET /api/messages/stream?ticket=%s&x=1 HTTP/1.1" 200', ('abc.def',), None)
+
+    message = NonBlockingQueueHandler(None).prepare(record).getMessage()
+    assert 'abc.def' not in message
+    assert 'ticket=[REDACTED]&x=1' in message
+
+
+def test_event_stream_ends_with_reconnect_after_max_age(app):
+    broker = MemoryBroker()
+    stream = event_stream(app, broker, 1, lambda: [], keepalive_interval=0.05, max_age=0.2)
+
+    frames = list(stream)
+    assert frames[-1].startswith('event: reconnect\n')
+    assert all(frame == ': keepalive\n\n' for frame in frames[:-1])
+    assert broker.stats()['connections'] == 0
+
+
+def test_shared_broker_required_with_several_workers(app):
+    app.config.update(NOTIFY_REQUIRE_SHARED_BROKER=True, WEB_CONCURRENCY=4)
+    with pytest.raises(RuntimeError):
+        init_notifications(app)
+
+    app.config['WEB_CONCURRENCY'] = 1
+    assert isinstance(init_notifications(app), MemoryBroker)
@@ -0,0 +1,82 @@
+import base64
+import json
+import pytest
+from app import db
+from app.models import FarmerProduct
+from app.utils.pagination import MAX_PER_PAGE, keyset_paginate
+from tests.conftest import login
+
+
+@pytest.fixture
+def products(app, seed):
+    with app.app_context():
+        template = db.session.get(FarmerProduct, seed['product_id'])
+        for index in range(4):
+            db.session.add(FarmerProduct(farmer_id=template.farmer_id, category_id=template.category_id,
+                                         name=f'Product {index}', price=20 + index, quantity=10, unit='kg',
+                                         product_type='produce', is_approved=True))
+        db.session.commit()
+
+
+def first_cursor(client, sort_by):
+    response = client.get(f'/api/products/?cursor=&per_page=2&sort_by={sort_by}')
+    assert response.status_code == 200
+    return response.get_json()['next_cursor']
+
+
+def test_cursor_pages_through_a_sort(client, products):
+    cursor = first_cursor(client, 'price_asc')
+    response = client.get(f'/api/products/?cursor={cursor}&per_page=2&sort_by=price_asc')
+    assert response.status_code == 200, (cursor, response.get_json())
+    assert [product['price'] for product in response.get_json()['products']] == [21.0, 22.0]
+
+
+@pytest.mark.parametrize('issued_for, replayed_with', [
+    ('newest', 'price_asc'),
+    ('price_asc', 'price_desc'),
+    ('price_desc', 'newest'),
+])
+def test_cursor_from_another_sort_is_rejected(client, products, issued_for, replayed_with):
+    cursor = first_cursor(client, issued_for)
+    response = client.get(f'/api/products/?cursor={cursor}&per_page=2&sort_by={replayed_with}')
+    assert response.status_code == 400
+
+
+def test_tampered_price_cursor_is_rejected(client, products):
+    cursor = first_cursor(client, 'price_asc')
+    payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    payload['values'][0] = 'not-a-price'
+    tampered = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+    response = client.get(f'/api/products/?cursor={tampered}&per_page=2&sort_by=price_asc')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('per_page', [0, -1])
+def test_keyset_pages_fall_back_for_per_page_below_one(client, seed, per_page):
+    headers = login(client, 'buyer@example.com')
+    sent = client.post('/api/messages/send', json={'receiver_id': seed['admin_id'], 'subject': 'Hi', 'message': 'Hello'},
+                       headers=headers)
+    assert sent.status_code == 201
+
+    response = client.get(f'/api/messages/conversations?per_page={per_page}', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()['conversations']) == 1
+
+    response = client.get(f'/api/products/?cursor=&per_page={per_page}')
+    assert response.status_code == 200
+    assert len(response.get_json()['products']) == 1
+
+
+def test_keyset_page_size_is_capped(app, seed):
+    with app.app_context():
+        template = db.session.get(FarmerProduct, seed['product_id'])
+        for index in range(MAX_PER_PAGE + 1):
+            db.session.add(FarmerProduct(farmer_id=template.farmer_id, category_id=template.category_id,
+                                         name=f'Extra {index}', price=1, quantity=1, unit='kg',
+                                         product_type='produce', is_approved=True))
+        db.session.commit()
+
+        page = keyset_paginate(FarmerProduct.query, [FarmerProduct.id], per_page=10 ** 6)
+        assert len(page.items) == MAX_PER_PAGE
+        assert page.next_cursor is not None
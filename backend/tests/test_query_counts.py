@@ -0,0 +1,196 @@
+"""
+Endpoints that must run a fixed number of queries however many rows they return
+Each test measures a request with one row and again with several; a
+difference means something is loaded per row (N+1).
+"""
+import pytest
+from app import db
+from app.models import Cart, CartItem, Category, FarmerProduct, FarmerProfile, Message, Order, OrderItem, ProductImage, User
+from app.utils.query_counter import count_queries
+from tests.conftest import login
+
+# Product listing page: the page (farmers and categories joined), the total and one batch of images
+LISTING_QUERY_BUDGET = 3
+
+
+def count_request_queries(app, send):
+    """Statements run by one request; send() makes it and returns the response"""
+    with app.app_context(), count_queries() as counter:
+        response = send()
+    assert response.status_code in (200, 201), response.get_json()
+    return counter.count
+
+
+def add_products(app, seed, count):
+    """`count` more approved products with an image each, spread over a second farmer and category"""
+    with app.app_context():
+        user = User.query.filter_by(email='farmer2@example.com').first()
+        if user is None:
+            user = User(email='farmer2@example.com', role='farmer', is_active=True)
+            user.set_password('secret')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all([FarmerProfile(user_id=user.id, full_name='Farmer Two', farm_name='Hill Farm'),
+                                Category(name='Fruits')])
+            db.session.flush()
+        farmers = [seed['farmer_id'], FarmerProfile.query.filter_by(user_id=user.id).one().id]
+        categories = [category.id for category in Category.query.all()]
+
+        ids = []
+        for index in range(count):
+            product = FarmerProduct(farmer_id=farmers[index % 2], category_id=categories[index % len(categories)],
+                                    name=f'Product {index}', price=5 + index, quantity=50, unit='kg',
+                                    product_type='produce', is_approved=True)
+            db.session.add(product)
+            db.session.flush()
+            db.session.add(ProductImage(product_id=product.id, image_url=f'/uploads/{index}.jpg', is_primary=True))
+            ids.append(product.id)
+        db.session.commit()
+        return ids
+
+
+@pytest.mark.parametrize('url', ['/api/products/', '/api/products/?cursor='])
+def test_product_listing_queries_do_not_grow_with_rows(app, client, seed, url):
+    one = count_request_queries(app, lambda: client.get(url))
+    add_products(app, seed, 6)
+
+    assert len(client.get(url).get_json()['products']) == 7
+    assert count_request_queries(app, lambda: client.get(url)) == one
+
+
+def test_query_budget_reports_repeated_statements(app, query_budget):
+    with pytest.raises(AssertionError, match='possible N\\+1'):
+        with query_budget(2):
+            for product_id in range(3):
+                db.session.get(FarmerProduct, product_id)
+
+
+def test_listing_fits_query_budget(client, seed, query_budget):
+    with query_budget(LISTING_QUERY_BUDGET):
+        assert client.get('/api/products/').status_code == 200
+
+
+def test_detector_logs_repeated_statements(app, client, seed, caplog):
+    def per_row_lookups():
+        for product_id in range(app.config['QUERY_DETECTOR_REPEAT_THRESHOLD']):
+            db.session.get(FarmerProduct, product_id)
+        return {}
+
+    app.add_url_rule('/n-plus-one', view_func=per_row_lookups)
+    with caplog.at_level('WARNING', logger='app.utils.query_detector'):
+        assert client.get('/n-plus-one').status_code == 200
+    assert any(record.getMessage().startswith('Possible N+1') for record in caplog.records)
+
+
+def add_threads(app, count, to_buyer=True, replies=3):
+    """`count` threads between the buyer and a new user each, with `replies` replies"""
+    with app.app_context():
+        buyer = User.query.filter_by(email='buyer@example.com').one()
+        offset = Message.query.count()
+        for index in range(offset, offset + count):
+            other = User(email=f'admin{index}@example.com', role='admin', is_active=True)
+            other.set_password('secret')
+            db.session.add(other)
+            db.session.flush()
+
+            sender, receiver = (other, buyer) if to_buyer else (buyer, other)
+            parent = Message(sender_id=sender.id, receiver_id=receiver.id, subject=f'Thread {index}',
+                             message='Hi', thread_id=f'thread-{index}')
+            db.session.add(parent)
+            db.session.flush()
+            db.session.add_all([
+                Message(sender_id=(receiver if reply % 2 == 0 else sender).id,
+                        receiver_id=(sender if reply % 2 == 0 else receiver).id,
+                        subject='Re', message=f'Reply {reply}', thread_id=parent.thread_id,
+                        parent_message_id=parent.id)
+                for reply in range(replies)
+            ])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/messages/inbox',
+    '/api/messages/inbox?reply_limit=2',
+    '/api/messages/inbox?cursor=&reply_limit=1',
+    '/api/messages/sent',
+])
+def test_inbox_queries_do_not_grow_with_threads(app, client, seed, url):
+    headers = login(client, 'buyer@example.com')
+    to_buyer = 'inbox' in url
+    add_threads(app, 1, to_buyer)
+    one = count_request_queries(app, lambda: client.get(url, headers=headers))
+    add_threads(app, 5, to_buyer)
+
+    messages = client.get(url, headers=headers).get_json()['messages']
+    assert len(messages) == 6 and all(message['reply_count'] == 3 for message in messages)
+    assert count_request_queries(app, lambda: client.get(url, headers=headers)) == one
+
+
+def fill_cart(app, seed, product_ids, quantity=2):
+    with app.app_context():
+        cart = Cart.query.filter_by(buyer_id=seed['buyer_id']).one()
+        db.session.add_all([CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity)
+                            for product_id in product_ids])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('url', ['/api/cart/', '/api/cart/?view=summary'])
+def test_cart_queries_do_not_grow_with_items(app, client, seed, url):
+    headers = login(client, 'buyer@example.com')
+    fill_cart(app, seed, [seed['product_id']])
+    one = count_request_queries(app, lambda: client.get(url, headers=headers))
+    fill_cart(app, seed, add_products(app, seed, 5))
+
+    assert client.get(url, headers=headers).get_json()['cart']['item_count'] == 6
+    assert count_request_queries(app, lambda: client.get(url, headers=headers)) == one
+
+
+def test_checkout_queries_do_not_grow_with_cart_lines(app, client, seed):
+    headers = login(client, 'buyer@example.com')
+    fill_cart(app, seed, [seed['product_id']])
+    one = count_request_queries(app, lambda: client.post('/api/orders/confirm', json={}, headers=headers))
+
+    fill_cart(app, seed, [seed['product_id']] + add_products(app, seed, 5))
+    many = count_request_queries(app, lambda: client.post('/api/orders/confirm', json={}, headers=headers))
+
+    with app.app_context():
+        assert [len(order.items.all()) for order in Order.query.order_by(Order.id)] == [1, 6]
+    assert many == one
+
+
+def add_orders(app, seed, count, product_ids):
+    """`count` pending orders, each with one line of every product in product_ids"""
+    with app.app_context():
+        products = [db.session.get(FarmerProduct, product_id) for product_id in product_ids]
+        offset = Order.query.count()
+        order_ids = []
+        for index in range(offset, offset + count):
+            order = Order(buyer_id=seed['buyer_id'], order_number=f'ORD-QC-{index}', total_amount=20)
+            db.session.add(order)
+            db.session.flush()
+            db.session.add_all([
+                OrderItem(order_id=order.id, product_id=product.id, farmer_id=product.farmer_id,
+                          product_name=product.name, product_price=product.price, quantity=1,
+                          unit='kg', subtotal=product.price)
+                for product in products
+            ])
+            order_ids.append(order.id)
+        db.session.commit()
+        return order_ids
+
+
+def test_batch_approval_queries_do_not_grow_with_orders(app, client, seed):
+    # Stock is deducted with one UPDATE per product, so the products stay fixed
+    headers = login(client, 'admin@example.com')
+    products = [seed['product_id']] + add_products(app, seed, 1)
+
+    def approve(order_ids):
+        return lambda: client.post('/api/admin/orders/approve-batch', json={'order_ids': order_ids}, headers=headers)
+
+    one = count_request_queries(app, approve(add_orders(app, seed, 1, products)))
+    many_ids = add_orders(app, seed, 5, products)
+    many = count_request_queries(app, approve(many_ids))
+
+    with app.app_context():
+        assert Order.query.filter(Order.id.in_(many_ids), Order.status == 'approved').count() == 5
+    assert many == one
@@ -0,0 +1,85 @@
+import threading
+from collections import Counter
+import pytest
+from app import db
+from app.models import FarmerProduct, Order, OrderItem
+from app.utils.stock import InsufficientStock, reserve_stock
+from tests.conftest import login
+
+
+def create_orders(app, seed, count, quantity):
+    with app.app_context():
+        order_ids = []
+        for index in range(count):
+            order = Order(buyer_id=seed['buyer_id'], order_number=f'ORD-TEST-{index}', total_amount=quantity * 10)
+            db.session.add(order)
+            db.session.flush()
+            db.session.add(OrderItem(order_id=order.id, product_id=seed['product_id'], farmer_id=seed['farmer_id'],
+                                     product_name='Tomatoes', product_price=10, quantity=quantity, unit='kg',
+                                     subtotal=quantity * 10))
+            order_ids.append(order.id)
+        db.session.commit()
+        return order_ids
+
+
+def approve_concurrently(app, headers, order_ids):
+    """PATCH every order id from its own thread, all released at once; returns the status codes"""
+    barrier = threading.Barrier(len(order_ids))
+    statuses = []
+    lock = threading.Lock()
+
+    def approve(order_id):
+        client = app.test_client()
+        barrier.wait()
+        response = client.patch(f'/api/admin/orders/{order_id}/approve', headers=headers)
+        with lock:
+            statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=approve, args=(order_id,)) for order_id in order_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(statuses)
+
+
+def test_concurrent_approvals_never_oversell(app, client, seed):
+    # 12 orders of 10 kg against 100 kg: exactly 10 can be approved
+    order_ids = create_orders(app, seed, 12, 10)
+    statuses = approve_concurrently(app, login(client, 'admin@example.com'), order_ids)
+
+    assert statuses[200] == 10
+    assert statuses[400] == 2
+    with app.app_context():
+        product = db.session.get(FarmerProduct, seed['product_id'])
+        assert product.quantity == 0
+        assert product.is_out_of_stock
+        assert Order.query.filter_by(status='approved').count() == 10
+
+
+def test_concurrent_approvals_of_one_order_claim_it_once(app, client, seed):
+    order_id, = create_orders(app, seed, 1, 10)
+    statuses = approve_concurrently(app, login(client, 'admin@example.com'), [order_id] * 8)
+
+    assert statuses[200] == 1
+    assert sum(statuses.values()) == 8
+    assert set(statuses) <= {200, 400, 409}
+    with app.app_context():
+        assert db.session.get(FarmerProduct, seed['product_id']).quantity == 90
+
+
+def test_reserve_stock_rejects_short_products(app, seed):
+    with app.app_context():
+        with pytest.raises(InsufficientStock) as error:
+            reserve_stock({seed['product_id']: 101})
+        db.session.rollback()
+
+        assert error.value.available == 100
+        assert db.session.get(FarmerProduct, seed['product_id']).quantity == 100
+
+
+@pytest.mark.parametrize('order_ids', [[True], [1, False], [], '1', ['1']])
+def test_batch_approval_rejects_non_integer_ids(client, seed, order_ids):
+    response = client.post('/api/admin/orders/approve-batch', json={'order_ids': order_ids},
+                           headers=login(client, 'admin@example.com'))
+    assert response.status_code == 400
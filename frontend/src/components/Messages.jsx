@@ -8,6 +8,8 @@ export default function Messages() {
   const { user } = useAuthStore();
   const [view, setView] = useState('conversations'); // 'conversations', 'thread', 'compose'
   const [conversations, setConversations] = useState([]);
+  const [conversationsCursor, setConversationsCursor] = useState(null); // next_cursor of the last page loaded
+  const [loadingMore, setLoadingMore] = useState(false);
   const [currentThread, setCurrentThread] = useState(null);
   const [threadMessages, setThreadMessages] = useState([]);
   const [unreadCount, setUnreadCount] = useState(0);
@@ -51,6 +53,7 @@ export default function Messages() {
     try {
       const response = await api.get('/messages/conversations');
       setConversations(response.data.conversations || []);
+      setConversationsCursor(response.data.has_more ? response.data.next_cursor : null);
     } catch (error) {
       console.error('Failed to load conversations:', error);
       toast.error('Failed to load messages');
@@ -59,6 +62,28 @@ export default function Messages() {
     }
   };
 
+  // Older conversations, one page at a time
+  const loadMoreConversations = async () => {
+    if (!conversationsCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get('/messages/conversations', {
+        params: { cursor: conversationsCursor },
+      });
+      const loaded = new Set(conversations.map((conv) => conv.thread_id));
+      setConversations([
+        ...conversations,
+        ...(response.data.conversations || []).filter((conv) => !loaded.has(conv.thread_id)),
+      ]);
+      setConversationsCursor(response.data.has_more ? response.data.next_cursor : null);
+    } catch (error) {
+      console.error('Failed to load more conversations:', error);
+      toast.error('Failed to load more messages');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchUnreadCount = async () => {
     try {
       const response = await api.get('/messages/unread-count');
@@ -258,6 +283,15 @@ export default function Messages() {
               </div>
             </div>
           ))}
+          {conversationsCursor && (
+            <button
+              onClick={loadMoreConversations}
+              disabled={loadingMore}
+              className="w-full py-2 text-sm text-green-700 bg-white rounded-lg shadow hover:bg-green-50 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load older conversations'}
+            </button>
+          )}
         </div>
       )}
     </div>
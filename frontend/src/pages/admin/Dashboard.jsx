@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import api, { adminAPI } from '../../services/api';
+import { adminAPI, subscribeUnreadCount } from '../../services/api';
 import useAuthStore from '../../store/authStore';
 import {
   LayoutDashboard, Users, UserPlus, Package, ShoppingCart,
@@ -17,23 +17,8 @@ export default function AdminDashboard() {
   const [sidebarOpen, setSidebarOpen] = useState(false);
   const [unreadCount, setUnreadCount] = useState(0);
 
-  useEffect(() => {
-    // Fetch unread message count
-    const fetchUnreadCount = async () => {
-      try {
-        const response = await api.get('/messages/unread-count');
-        setUnreadCount(response.data.unread_count || 0);
-      } catch (error) {
-        console.error('Failed to fetch unread count:', error);
-      }
-    };
-
-    fetchUnreadCount();
-
-    // Refresh unread count every 30 seconds
-    const interval = setInterval(fetchUnreadCount, 30000);
-    return () => clearInterval(interval);
-  }, []);
+  // Unread message count is pushed by the server
+  useEffect(() => subscribeUnreadCount(setUnreadCount), []);
 
   const handleLogout = async () => {
     await logout();
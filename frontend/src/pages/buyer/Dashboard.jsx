@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import useAuthStore from '../../store/authStore';
-import api from '../../services/api';
+import api, { subscribeUnreadCount } from '../../services/api';
 import {
   ShoppingCart,
   Package,
@@ -73,32 +73,21 @@ export default function BuyerDashboard() {
 
   useEffect(() => {
     fetchCartCount();
-    fetchUnreadCount();
-
-    // Refresh unread count every 30 seconds
-    const interval = setInterval(fetchUnreadCount, 30000);
-    return () => clearInterval(interval);
   }, []);
 
+  // Unread message count is pushed by the server
+  useEffect(() => subscribeUnreadCount(setUnreadCount), []);
+
   const fetchCartCount = async () => {
     try {
-      const response = await api.get('/cart');
-      setCartCount(response.data.cart?.items?.length || 0);
+      const response = await api.get('/cart', { params: { view: 'summary' } });
+      setCartCount(response.data.cart?.item_count || 0);
     } catch (error) {
       console.error('Failed to fetch cart count:', error);
       setCartCount(0);
     }
   };
 
-  const fetchUnreadCount = async () => {
-    try {
-      const response = await api.get('/messages/unread-count');
-      setUnreadCount(response.data.unread_count || 0);
-    } catch (error) {
-      console.error('Failed to fetch unread count:', error);
-    }
-  };
-
   const handleLogout = () => {
     logout();
     navigate('/login');
@@ -357,6 +346,8 @@ function BrowseProductsTab({ fetchCartCount, getImageUrl }) {
 function CartTab({ setActiveTab, fetchCartCount }) {
   const [cart, setCart] = useState(null);
   const [loading, setLoading] = useState(true);
+  // Reused until the server answers, so retries and double clicks place one order
+  const checkoutKey = useRef(null);
 
   useEffect(() => {
     fetchCart();
@@ -404,13 +395,24 @@ function CartTab({ setActiveTab, fetchCartCount }) {
       return;
     }
 
+    if (!checkoutKey.current) {
+      checkoutKey.current = crypto.randomUUID();
+    }
+
     try {
-      await api.post('/orders/confirm', {});
+      await api.post('/orders/confirm', {}, {
+        headers: { 'Idempotency-Key': checkoutKey.current },
+      });
+      checkoutKey.current = null;
       toast.success('Order placed successfully! Awaiting admin approval.');
       fetchCart();
       fetchCartCount();
       setActiveTab('orders');
     } catch (error) {
+      // Keep the key after a network failure so the retry can be recognised
+      if (error.response && error.response.status !== 409) {
+        checkoutKey.current = null;
+      }
       toast.error(error.response?.data?.message || 'Failed to place order');
     }
   };
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import useAuthStore from '../../store/authStore';
-import api from '../../services/api';
+import api, { subscribeUnreadCount } from '../../services/api';
 import {
   LayoutDashboard,
   Package,
@@ -67,22 +67,8 @@ export default function FarmerDashboard() {
     { id: 'profile', label: 'Profile', icon: User }
   ];
 
-  useEffect(() => {
-    fetchUnreadCount();
-
-    // Refresh unread count every 30 seconds
-    const interval = setInterval(fetchUnreadCount, 30000);
-    return () => clearInterval(interval);
-  }, []);
-
-  const fetchUnreadCount = async () => {
-    try {
-      const response = await api.get('/messages/unread-count');
-      setUnreadCount(response.data.unread_count || 0);
-    } catch (error) {
-      console.error('Failed to fetch unread count:', error);
-    }
-  };
+  // Unread message count is pushed by the server
+  useEffect(() => subscribeUnreadCount(setUnreadCount), []);
 
   const handleLogout = () => {
     logout();
@@ -77,7 +77,11 @@ export const adminAPI = {
   approveProduct: (productId) => api.patch(`/admin/products/${productId}/approve`),
   rejectProduct: (productId) => api.delete(`/admin/products/${productId}/reject`),
   getPendingOrders: (params) => api.get('/admin/orders/pending', { params }),
-  approveOrder: (orderId) => api.patch(`/admin/orders/${orderId}/approve`),
+  // One key per order, so a double-clicked approval replays the first response
+  approveOrder: (orderId) => api.patch(`/admin/orders/${orderId}/approve`, null, {
+    headers: { 'Idempotency-Key': `approve-order-${orderId}` },
+  }),
+  approveOrdersBatch: (orderIds) => api.post('/admin/orders/approve-batch', { order_ids: orderIds }),
   rejectOrder: (orderId, data) => api.patch(`/admin/orders/${orderId}/reject`, data),
   getCategories: () => api.get('/admin/categories'),
   createCategory: (data) => api.post('/admin/categories', data),
@@ -131,6 +135,84 @@ export const ordersAPI = {
   confirmOrder: (data) => api.post('/orders/confirm', data),
 };
 
+// Subscribe to the unread message count pushed over Server-Sent Events.
+// The stream is opened with a short-lived ticket rather than the access token,
+// which would otherwise end up in server and proxy logs. The server ends each
+// stream after a while with a reconnect event, and a refused stream (e.g. an
+// expired ticket) is retried, both with a fresh ticket. A slow poll keeps
+// running while connected in case a push is lost; polling takes over fully
+// when EventSource is unavailable or no ticket can be had.
+// Returns a cleanup function, so it can be returned straight from useEffect.
+export const subscribeUnreadCount = (
+  onCount,
+  pollInterval = 30000,
+  reconnectDelay = 5000,
+  safetyPollInterval = 120000
+) => {
+  let source = null;
+  let pollTimer = null;
+  let safetyTimer = null;
+  let reconnectTimer = null;
+  let closed = false;
+
+  const poll = async () => {
+    try {
+      const response = await api.get('/messages/unread-count');
+      onCount(response.data.unread_count || 0);
+    } catch (error) {
+      console.error('Failed to fetch unread count:', error);
+    }
+  };
+
+  const startPolling = () => {
+    if (pollTimer) return;
+    poll();
+    pollTimer = setInterval(poll, pollInterval);
+  };
+
+  const connect = async () => {
+    if (source) source.close();
+    let ticket;
+    try {
+      const response = await api.post('/messages/stream-ticket');
+      ticket = response.data.ticket;
+    } catch (error) {
+      startPolling();
+      return;
+    }
+    if (closed) return;
+
+    const stream = new EventSource(`${API_BASE_URL}/messages/stream?ticket=${encodeURIComponent(ticket)}`);
+    source = stream;
+    const handleEvent = (event) => onCount(JSON.parse(event.data).unread_count || 0);
+    stream.addEventListener('unread_count', handleEvent);
+    stream.addEventListener('message', handleEvent);
+    // The server is about to end this stream; the ticket is spent, so fetch a new one
+    stream.addEventListener('reconnect', () => connect());
+    // EventSource reconnects by itself unless the server refused the stream
+    stream.onerror = () => {
+      if (stream.readyState === EventSource.CLOSED && !closed) {
+        reconnectTimer = setTimeout(connect, reconnectDelay);
+      }
+    };
+  };
+
+  if (typeof EventSource === 'undefined' || !localStorage.getItem('access_token')) {
+    startPolling();
+  } else {
+    connect();
+    safetyTimer = setInterval(poll, safetyPollInterval);
+  }
+
+  return () => {
+    closed = true;
+    if (source) source.close();
+    if (pollTimer) clearInterval(pollTimer);
+    if (safetyTimer) clearInterval(safetyTimer);
+    if (reconnectTimer) clearTimeout(reconnectTimer);
+  };
+};
+
 // Upload API
 export const uploadAPI = {
   uploadImage: (formData) => api.post('/upload/image', formData, {